@@ -3,40 +3,279 @@ import scripts.categories
 import scripts.attributes
 import scripts.attribute_values
 import scripts.mappings
+import scripts.inheritance
+import scripts.search_index
 import scripts.utils
 import scripts.localizations
+import scripts.registry
+import scripts.id_ledger
+import scripts.cache
+import scripts.sqlite_export
+import scripts.postgres_export
+import scripts.binary_export
+import scripts.arrow_export
+import scripts.shard_export
+import scripts.delta
+import scripts.instrumentation
+import scripts.scheduler
+import scripts.taxonomy
+import scripts.json_stream
+import argparse
 import logging
 import os
-import csv
-import json
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 # Configuration
 version = '2025-06-unstable'
 source_language_code = 'en'  # Default source language
 language_codes = ['fi', 'sv']
-
-def setup_logging():
+output_root = 'data/output'
+
+# Extra targets (SQLite database, PostgreSQL COPY files) that receive every table written as CSV
+output_sinks = []
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Convert the Shopify taxonomy dist into .csv files')
+    parser.add_argument(
+        '--version',
+        dest='versions',
+        nargs='+',
+        default=[version],
+        metavar='VERSION',
+        help=f'Taxonomy versions to convert, read from data/input/VERSION/dist (default: {version}). '
+             'Several versions are converted concurrently in separate processes'
+    )
+    parser.add_argument(
+        '--languages',
+        nargs='+',
+        default=language_codes,
+        metavar='LANG',
+        help=f'Language codes to extract localizations for (default: {" ".join(language_codes)})'
+    )
+    parser.add_argument(
+        '--source-language',
+        default=source_language_code,
+        metavar='LANG',
+        help=f'Language of the entity tables (default: {source_language_code})'
+    )
+    parser.add_argument(
+        '--output-dir',
+        default=output_root,
+        metavar='DIR',
+        help=f'Directory the output of each version is written to, in DIR/VERSION (default: {output_root})'
+    )
+    parser.add_argument(
+        '--only',
+        nargs='+',
+        metavar='STEP',
+        help="Only run these steps (e.g. 'categories' 'category localizations'), plus the steps they depend on"
+    )
+    parser.add_argument(
+        '--skip',
+        nargs='+',
+        metavar='STEP',
+        help='Skip these steps and the steps that depend on them'
+    )
+    parser.add_argument(
+        '--version-jobs',
+        type=int,
+        help='Number of versions converted at the same time (default: one process per version, up to the CPU count)'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Number of processes used to extract localizations per language (default: 1, serial)'
+    )
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        default=1,
+        help='Number of pipeline steps run concurrently once their inputs are ready (default: 1, serial); '
+             'steps share one process, so this overlaps file I/O and waits on --workers rather than adding CPUs'
+    )
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help='Read the dist files incrementally and write rows as they are extracted, '
+             'keeping peak memory flat as the dist grows (files shared by steps are read once per step)'
+    )
+    parser.add_argument(
+        '--sqlite',
+        metavar='PATH',
+        help='Also load every table into this SQLite database, with integer keys and indexes '
+             '({version} in PATH is replaced by the version)'
+    )
+    parser.add_argument(
+        '--postgres',
+        metavar='DIR',
+        help='Also write every table as a PostgreSQL COPY file into DIR, with a load.sql script '
+             '({version} in DIR is replaced by the version)'
+    )
+    parser.add_argument(
+        '--postgres-format',
+        choices=['text', 'binary'],
+        default='text',
+        help='COPY format of the --postgres files (default: text)'
+    )
+    parser.add_argument(
+        '--arrow',
+        metavar='DIR',
+        help='Also write every table as a typed columnar file into DIR (needs pyarrow, '
+             '{version} in DIR is replaced by the version)'
+    )
+    parser.add_argument(
+        '--arrow-format',
+        choices=['parquet', 'ipc'],
+        default='parquet',
+        help='File format of the --arrow files: Parquet or Arrow IPC (default: parquet)'
+    )
+    parser.add_argument(
+        '--shard-by-vertical',
+        action='store_true',
+        help='Also write categories, category-attribute mappings and category localizations as one CSV per vertical '
+             'to the shards directory of the version output, with a manifest of row counts and checksums'
+    )
+    parser.add_argument(
+        '--wide-localizations',
+        action='store_true',
+        help='Also write localizations/localizations_{type}_wide.csv with one row per entity '
+             'and a name column per language'
+    )
+    parser.add_argument(
+        '--search-index',
+        action='store_true',
+        help='Also write search_index.pickle, a trigram index over all names in every language'
+    )
+    parser.add_argument(
+        '--fallback',
+        nargs='*',
+        metavar='LANG=CHAIN',
+        help='Fill missing translations from fallback languages and add a resolved_from column. '
+             'Without values a regional language falls back to its base language and then to the source language '
+             '(pt-BR -> pt -> en); LANG=CHAIN (e.g. pt-BR=pt,es,en) sets the chain of a language'
+    )
+    parser.add_argument(
+        '--binary',
+        action='store_true',
+        help='Also write every table as a memory-mappable binary file to the binary directory of the version output'
+    )
+    parser.add_argument(
+        '--delta-from',
+        metavar='VERSION',
+        help='Also write upsert and delete files against the output of VERSION to delta/VERSION in the version output'
+    )
+    parser.add_argument(
+        '--id-ledger',
+        metavar='PATH',
+        help='Keep serial ids stable across versions with the id ledger in PATH (created if missing)'
+    )
+    parser.add_argument(
+        '--report',
+        metavar='PATH',
+        help='Write a JSON run report with wall time, CPU time, peak memory, input bytes and output rows per step'
+    )
+    parser.add_argument(
+        '--profile',
+        metavar='DIR',
+        help='Dump a cProfile file per step into DIR (implies --jobs 1)'
+    )
+    parser.add_argument(
+        '--trace-memory',
+        action='store_true',
+        help='Add the tracemalloc peak of each step to the --report (slower)'
+    )
+    parser.add_argument(
+        '--cache-dir',
+        default='data/cache',
+        help='Directory for cached step results, reused while inputs, config and code are unchanged (default: data/cache)'
+    )
+    parser.add_argument(
+        '--clear-cache',
+        action='store_true',
+        help='Remove every cached step result before the run'
+    )
+    parser.add_argument(
+        '--cache-max-age',
+        type=float,
+        default=30,
+        metavar='DAYS',
+        help='Remove cached step results no run has used for DAYS days after the run (default: 30)'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Recompute every step without reading or writing the cache'
+    )
+    args = parser.parse_args(argv)
+    try:
+        args.fallback = fallback_chains(args.fallback, args.languages, args.source_language)
+    except ValueError as e:
+        parser.error(str(e))
+    if len(args.versions) > 1:
+        # Every version needs its own database, directory and report
+        for option in ('sqlite', 'postgres', 'arrow', 'report', 'profile'):
+            value = getattr(args, option)
+            if value and '{version}' not in value:
+                parser.error(f"--{option} needs a {{version}} placeholder when several versions are converted")
+    if args.only or args.skip:
+        # Declaring the steps reads nothing, so unknown names fail before any work is done
+        steps = build_steps(
+            scripts.taxonomy.Taxonomy(args.versions[0], args.source_language, streaming=args.stream),
+            scripts.registry.IdRegistry(),
+            args.workers,
+            search_index=args.search_index
+        )
+        try:
+            scripts.scheduler.check_step_names(steps, (args.only or []) + (args.skip or []))
+        except ValueError as e:
+            parser.error(str(e))
+    return args
+
+def setup_logging(version_name=None):
+    # Processes converting one of several versions tag their log lines with it
+    prefix = f'[{version_name}] ' if version_name else ''
     logging.basicConfig(
         level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s'
+        format=f'%(asctime)s - %(levelname)s - {prefix}%(message)s',
+        force=version_name is not None
     )
 
+def version_path(path):
+    """Path option for the current version, with {version} replaced."""
+    return path.replace('{version}', version) if path else path
+
 def ensure_output_directories():
-    output_dir = f'data/output/{version}'
+    output_dir = f'{output_root}/{version}'
     os.makedirs(output_dir, exist_ok=True)
 
 def write_verticals(data):
     scripts.utils.write_csv(
         data,
         ['id', 'name', 'prefix'],
-        f'data/output/{version}/verticals.csv'
+        f'{output_root}/{version}/verticals.csv',
+        sinks=output_sinks
     )
 
 def write_categories(data):
+    categories_info, nested_set, closure = data
     scripts.utils.write_csv(
-        data,
+        categories_info,
         ['id', 'shopify_id', 'shopify_uri', 'level', 'name', 'full_name', 'parent_id', 'vertical_id'],
-        f'data/output/{version}/categories.csv'
+        f'{output_root}/{version}/categories.csv',
+        sinks=output_sinks
+    )
+    scripts.utils.write_csv(
+        nested_set,
+        ['category_id', 'lft', 'rgt'],
+        f'{output_root}/{version}/category_nested_set.csv',
+        sinks=output_sinks
+    )
+    scripts.utils.write_csv(
+        closure,
+        ['ancestor_id', 'descendant_id', 'depth'],
+        f'{output_root}/{version}/category_closure.csv',
+        sinks=output_sinks
     )
 
 def write_attributes(data):
@@ -44,43 +283,62 @@ def write_attributes(data):
     scripts.utils.write_csv(
         attributes_info,
         ['id', 'name', 'handle', 'description', 'shopify_id', 'shopify_uri'],
-        f'data/output/{version}/attributes.csv'
+        f'{output_root}/{version}/attributes.csv',
+        sinks=output_sinks
     )
     scripts.utils.write_csv(
         extended_attributes_info,
         ['id', 'name', 'handle'],
-        f'data/output/{version}/extended_attributes.csv'
+        f'{output_root}/{version}/extended_attributes.csv',
+        sinks=output_sinks
     )
 
 def write_attribute_values(data):
     scripts.utils.write_csv(
         data,
         ['id', 'shopify_id', 'shopify_uri', 'name', 'handle'],
-        f'data/output/{version}/attribute_values.csv'
+        f'{output_root}/{version}/attribute_values.csv',
+        sinks=output_sinks
     )
 
 def write_mappings(data):
     scripts.utils.write_csv(
         data,
         ['attribute_id', 'value_id'],
-        f'data/output/{version}/attribute_value_mappings.csv'
+        f'{output_root}/{version}/attribute_value_mappings.csv',
+        sinks=output_sinks
     )
 
-def write_category_attribute_mappings(data):
+def write_category_attribute_mappings(data, category_parents):
+    declared = {}
     scripts.utils.write_csv(
-        data,
+        scripts.inheritance.collect_declared(data, declared),
         ['category_id', 'extended_attribute_id', 'attribute_id'],
-        f'data/output/{version}/category_attribute_mappings.csv'
+        f'{output_root}/{version}/category_attribute_mappings.csv',
+        sinks=output_sinks
+    )
+    # Attributes declared on a category and on its ancestors
+    effective_attributes = scripts.inheritance.EffectiveAttributes(list(category_parents.items()), declared)
+    scripts.utils.write_csv(
+        # Missing extended attributes are written with the 'NULL' marker, as in category_attribute_mappings.csv
+        (
+            {**row, 'extended_attribute_id': 'NULL'} if row['extended_attribute_id'] is None else row
+            for row in effective_attributes.rows()
+        ),
+        ['category_id', 'attribute_id', 'extended_attribute_id', 'source_category_id'],
+        f'{output_root}/{version}/category_effective_attributes.csv',
+        sinks=output_sinks
     )
 
 def write_attribute_extended_mappings(data):
     scripts.utils.write_csv(
         data,
         ['attribute_id', 'extended_attribute_id'],
-        f'data/output/{version}/attribute_extended_mappings.csv'
+        f'{output_root}/{version}/attribute_extended_mappings.csv',
+        sinks=output_sinks
     )
 
-def write_localizations(data, entity_type):
+def write_localizations(data, entity_type, entity_ids=None, resolved=False):
     # Define headers based on entity type
     if entity_type == 'category':
         headers = ['id', 'category_id', 'language_code', 'name', 'full_name']
@@ -92,82 +350,73 @@ def write_localizations(data, entity_type):
         headers = ['id', 'extended_attribute_id', 'language_code', 'name']
     else:  # attribute_value
         headers = ['id', 'attribute_value_id', 'language_code', 'name']
+    # Language each name was taken from, when missing translations are resolved through fallbacks
+    if resolved:
+        headers = headers + ['resolved_from']
     
     scripts.utils.write_csv(
         data,
         headers,
-        f'data/output/{version}/localizations/localizations_{entity_type}.csv'
+        f'{output_root}/{version}/localizations/localizations_{entity_type}.csv',
+        sinks=output_sinks
     )
 
-def check_and_remove_duplicates(file_path):
-    logger = logging.getLogger(__name__)
-    
-    # Read the CSV file
-    rows = []
-    duplicates = []
-    seen = set()
-    
-    with open(file_path, 'r', encoding='utf-8') as csvfile:
-        reader = csv.DictReader(csvfile)
-        headers = reader.fieldnames
-        
-        for row in reader:
-            # Create a tuple of the non-empty values to use as a hash key
-            # Handle different file types appropriately
-            if 'category_id' in headers and 'extended_attribute_id' in headers:
-                # For category_attribute_mappings.csv, compare all three fields
-                row_tuple = (
-                    row['category_id'],
-                    row['attribute_id'],
-                    row.get('extended_attribute_id', '')  # Use empty string if not present
-                )
-            elif 'extended_attribute_id' in headers:
-                # For attribute_extended_mappings.csv, compare both fields
-                row_tuple = (
-                    row['attribute_id'],
-                    row['extended_attribute_id']
-                )
-            else:
-                # For other files, compare all fields
-                row_tuple = tuple(row.values())
-            
-            if row_tuple in seen:
-                duplicates.append(row)
-            else:
-                seen.add(row_tuple)
-                rows.append(row)
-    
-    # Only log if duplicates are found
-    if duplicates:
-        logger.warning(f"Found {len(duplicates)} duplicate entries")
-        
-        # Write back the deduplicated data
-        with open(file_path, 'w', encoding='utf-8', newline='') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=headers)
-            writer.writeheader()
-            writer.writerows(rows)
+    # One row per entity with a name column per language, from the same rows
+    if entity_ids is not None:
+        wide_headers, wide_rows = scripts.localizations.pivot_localizations(
+            data, headers[1], entity_ids, language_codes, source_language_code
+        )
+        scripts.utils.write_csv(
+            wide_rows,
+            wide_headers,
+            f'{output_root}/{version}/localizations/localizations_{entity_type}_wide.csv',
+            sinks=output_sinks
+        )
 
-def extract_all_localizations(entity_type, yaml_dir, id_loader):
+def fallback_chains(fallback_args, languages, source_language):
+    """Fallback chains of languages from the --fallback values, or None when it is not given."""
+    if fallback_args is None:
+        return None
+    overrides = {}
+    for fallback_arg in fallback_args:
+        lang, separator, chain = fallback_arg.partition('=')
+        if not separator or not lang:
+            raise ValueError(f"Invalid --fallback value '{fallback_arg}', expected LANG=CHAIN, e.g. pt-BR=pt,en")
+        overrides[lang] = [code.strip() for code in chain.split(',') if code.strip()]
+    return scripts.localizations.fallback_chains(languages, source_language, overrides)
+
+def extract_all_localizations(entity_type, dist_dir, entity_ids, workers, cache, ids=None, fallbacks=None):
     """
-    Wrapper function to pass language_codes and version to the actual implementation
+    Wrapper function to pass language_codes to the actual implementation
     """
     return scripts.localizations.extract_all_localizations(
         entity_type, 
-        yaml_dir, 
-        id_loader, 
+        dist_dir, 
+        entity_ids, 
         language_codes,
-        version  # Pass the version from main.py
+        workers,
+        cache,
+        ids,
+        fallbacks
     )
 
-def check_version_consistency(version, source_language_code):
+def check_version_consistency(taxonomy, source_language_code, cache=None):
     logger = logging.getLogger(__name__)
-    taxonomy_path = f'data/input/{version}/dist/{source_language_code}/taxonomy.json'
+    version = taxonomy.version
+    taxonomy_path = f'{taxonomy.dist_dir}/{source_language_code}/taxonomy.json'
     
     try:
-        with open(taxonomy_path, 'r', encoding='utf-8') as f:
-            taxonomy_data = json.load(f)
+        # taxonomy.json is the largest dist file, only the members up to its version are read
+        if cache is None:
+            taxonomy_version = scripts.json_stream.read_member(taxonomy_path, 'version')
+        else:
+            # The version is cached by content hash as well
+            key = cache.fingerprint('version check', [taxonomy_path])
+            hit, taxonomy_version = cache.get(key)
+            if not hit:
+                taxonomy_version = scripts.json_stream.read_member(taxonomy_path, 'version')
+                cache.put(key, taxonomy_version)
             
-        taxonomy_version = taxonomy_data.get('version')
         if taxonomy_version != version:
             raise ValueError(
                 f"Version mismatch: Script version '{version}' does not match "
@@ -177,178 +426,465 @@ def check_version_consistency(version, source_language_code):
     except FileNotFoundError:
         raise FileNotFoundError(f"Taxonomy file not found: {taxonomy_path}")
 
-def main():
-    setup_logging()
-    logger = logging.getLogger(__name__)
+def build_steps(taxonomy, registry, workers, cache=None, report=None, ledger=None, wide_localizations=False, fallbacks=None, search_index=False):
+    """
+    Declare the pipeline steps with the artifacts they read and produce.
+    Steps register the serial ids they create, later steps read them from the registry.
+    Dist files are only decoded when a step is not served from the cache.
+    With an id ledger, entity ids are taken from it instead of the dist order.
+    With wide_localizations, every localization step also writes its wide table.
+    With fallbacks (language code -> fallback languages), missing translations are
+    filled from the fallback languages.
+    With search_index, the localization rows are kept for the search index step.
+    """
+    # Streamed rows go straight from the dist files into the CSV writers. They are
+    # not cached, since that would keep every row in memory again.
+    streaming = taxonomy.streaming
+    step_cache = None if streaming else cache
 
-    try:
-        # Add version check
-        logger.info("Step 1: Version check")
-        check_version_consistency(version, source_language_code)
-        logger.info("Version check: OK")
-        
-        # Create output directories
-        ensure_output_directories()
-        os.makedirs(f'data/output/{version}/localizations', exist_ok=True)
+    def source_file(file_name):
+        return f'{taxonomy.dist_dir}/{source_language_code}/{file_name}'
 
-        # Process verticals
-        logger.info("Step 2: Verticals")
-        verticals_data = scripts.utils.process_step(
+    def ledger_ids(entity_type):
+        return ledger[entity_type] if ledger else None
+
+    def ledger_config(config, *entity_types):
+        # Cached ids are only valid for the ledger state they were allocated from
+        if not ledger:
+            return config
+        return {**(config or {}), 'ledger': [ledger[entity_type].digest() for entity_type in entity_types]}
+
+    def verticals():
+        data = scripts.utils.process_step(
             "verticals",
-            scripts.verticals.extract_verticals,
+            lambda: scripts.verticals.extract_verticals(taxonomy.categories(source_language_code), ledger_ids('verticals')),
             write_verticals,
-            f'data/input/{version}/dist/{source_language_code}/categories.json'
+            cache=cache,
+            inputs=[source_file('categories.json')],
+            config=ledger_config(None, 'verticals'),
+            report=report
         )
-        logger.info("Verticals: OK")
-
-        # Process categories
-        logger.info("Step 3: Categories")
-        categories_data = scripts.utils.process_step(
+        registry.verticals.register(data)
+        return data
+
+    def categories():
+        if streaming:
+            def extract():
+                categories_info, nested_set, closure = scripts.categories.iter_category_hierarchy(
+                    lambda: taxonomy.categories(source_language_code),
+                    registry.verticals.by_handle,
+                    ledger_ids('categories')
+                )
+                return registry.categories.track(categories_info), nested_set, closure
+        else:
+            extract = lambda: scripts.categories.extract_category_hierarchy(
+                taxonomy.categories(source_language_code),
+                registry.verticals.by_handle,
+                ledger_ids('categories')
+            )
+        data = scripts.utils.process_step(
             "categories",
-            scripts.categories.extract_categories,
+            extract,
             write_categories,
-            f'data/input/{version}/dist/{source_language_code}/categories.json',
-            scripts.categories.load_vertical_ids(version)
+            cache=step_cache,
+            inputs=[source_file('categories.json')],
+            config=ledger_config({'verticals': registry.verticals.digest()}, 'categories'),
+            report=report
         )
-        logger.info("Categories: OK")
-
-        # Process attributes
-        logger.info("Step 4: Attributes")
-        attributes_data = scripts.utils.process_step(
+        if not streaming:
+            categories_info, _, _ = data
+            registry.categories.register(categories_info)
+        return data
+
+    def attributes():
+        if streaming:
+            def extract():
+                attributes_info, extended_attributes_info = scripts.attributes.iter_attributes_and_extended(
+                    taxonomy.attributes(source_language_code),
+                    ledger_ids('attributes'),
+                    ledger_ids('extended_attributes')
+                )
+                return (
+                    registry.attributes.track(attributes_info),
+                    registry.extended_attributes.track(extended_attributes_info)
+                )
+        else:
+            extract = lambda: scripts.attributes.extract_attributes_and_extended(
+                taxonomy.attributes(source_language_code),
+                ledger_ids('attributes'),
+                ledger_ids('extended_attributes')
+            )
+        data = scripts.utils.process_step(
             "attributes",
-            scripts.attributes.extract_attributes_and_extended,
+            extract,
             write_attributes,
-            f'data/input/{version}/dist/{source_language_code}/attributes.json'
+            cache=step_cache,
+            inputs=[source_file('attributes.json')],
+            config=ledger_config(None, 'attributes', 'extended_attributes'),
+            report=report
         )
-        logger.info("Attributes: OK")
-
-        # Process attribute values
-        logger.info("Step 5: Attribute values")
-        attribute_values_data = scripts.utils.process_step(
+        if not streaming:
+            attributes_info, extended_attributes_info = data
+            registry.attributes.register(attributes_info)
+            registry.extended_attributes.register(extended_attributes_info)
+        return data
+
+    def attribute_values():
+        if streaming:
+            extract = lambda: registry.attribute_values.track(
+                scripts.attribute_values.iter_attribute_values(
+                    taxonomy.attribute_values(source_language_code),
+                    ledger_ids('attribute_values')
+                )
+            )
+        else:
+            extract = lambda: scripts.attribute_values.extract_attribute_values(
+                taxonomy.attribute_values(source_language_code),
+                ledger_ids('attribute_values')
+            )
+        data = scripts.utils.process_step(
             "attribute values",
-            scripts.attribute_values.extract_attribute_values,
+            extract,
             write_attribute_values,
-            f'data/input/{version}/dist/{source_language_code}/attribute_values.json'
+            cache=step_cache,
+            inputs=[source_file('attribute_values.json')],
+            config=ledger_config(None, 'attribute_values'),
+            report=report
         )
-        logger.info("Attribute values: OK")
+        if not streaming:
+            registry.attribute_values.register(data)
+        return data
 
-        # Process mappings
-        logger.info("Step 6: Mappings")
-        mappings_data = scripts.utils.process_step(
+    def mappings():
+        build = scripts.mappings.iter_attribute_value_mappings if streaming else scripts.mappings.create_attribute_value_mappings
+        return scripts.utils.process_step(
             "mappings",
-            scripts.mappings.create_attribute_value_mappings,
+            lambda: build(
+                taxonomy.attributes(source_language_code),
+                registry.attributes.by_shopify_id,
+                registry.attribute_values.by_shopify_id
+            ),
             write_mappings,
-            f'data/input/{version}/dist/{source_language_code}/attributes.json',
-            scripts.mappings.load_attribute_ids(version),
-            scripts.mappings.load_attribute_value_ids(version)
+            cache=step_cache,
+            inputs=[source_file('attributes.json')],
+            config={
+                'attributes': registry.attributes.digest(),
+                'attribute_values': registry.attribute_values.digest()
+            },
+            report=report
         )
-        logger.info("Mappings: OK")
 
-        # Process category-attribute mappings
-        logger.info("Step 7: Category-attribute mappings")
-        category_attribute_mappings_data = scripts.utils.process_step(
+    def category_attribute_mappings():
+        build = scripts.mappings.iter_category_attribute_mappings if streaming else scripts.mappings.create_category_attribute_mappings
+        return scripts.utils.process_step(
             "category-attribute mappings",
-            scripts.mappings.create_category_attribute_mappings,
-            write_category_attribute_mappings,
-            f'data/input/{version}/dist/{source_language_code}/categories.json',
-            scripts.mappings.load_category_ids(version),
-            scripts.mappings.load_attribute_ids(version),
-            scripts.mappings.load_extended_attribute_ids(version)
+            lambda: build(
+                taxonomy.categories(source_language_code),
+                registry.categories.by_shopify_id,
+                registry.attributes.by_shopify_id,
+                registry.extended_attributes.by_handle
+            ),
+            lambda data: write_category_attribute_mappings(data, registry.categories.parents),
+            cache=step_cache,
+            inputs=[source_file('categories.json')],
+            config={
+                'categories': registry.categories.digest(),
+                'attributes': registry.attributes.digest(),
+                'extended_attributes': registry.extended_attributes.digest()
+            },
+            report=report
         )
-        logger.info("Category-attribute mappings: OK")
 
-        # Process attribute-extended attribute mappings
-        logger.info("Step 8: Attribute-extended attribute mappings")
-        attribute_extended_mappings_data = scripts.utils.process_step(
+    def attribute_extended_mappings():
+        build = scripts.mappings.iter_attribute_extended_mappings if streaming else scripts.mappings.create_attribute_extended_mappings
+        return scripts.utils.process_step(
             "attribute-extended attribute mappings",
-            scripts.mappings.create_attribute_extended_mappings,
+            lambda: build(
+                taxonomy.attributes(source_language_code),
+                registry.attributes.by_shopify_id,
+                registry.extended_attributes.by_handle
+            ),
             write_attribute_extended_mappings,
-            f'data/input/{version}/dist/{source_language_code}/attributes.json',
-            scripts.mappings.load_attribute_ids(version),
-            scripts.mappings.load_extended_attribute_ids(version)
-        )
-        logger.info("Attribute-extended attribute mappings: OK")
-
-        # Check for duplicates in mapping files
-        logger.info("Step 9: Checking for duplicates")
-        mapping_files = [
-            f'data/output/{version}/attribute_value_mappings.csv',
-            f'data/output/{version}/category_attribute_mappings.csv',
-            f'data/output/{version}/attribute_extended_mappings.csv'
-        ]
-        
-        for file_path in mapping_files:
-            check_and_remove_duplicates(file_path)
-        logger.info("Checking for duplicates: OK")
-
-        # Process category localizations
-        logger.info("Step 10: Category localizations")
-        category_localizations_data = scripts.utils.process_step(
-            "category localizations",
-            lambda yaml_dir, id_loader: extract_all_localizations('category', f'data/input/{version}/dist', id_loader),
-            lambda data: write_localizations(data, 'category'),
-            f'data/input/{version}/dist',
-            scripts.localizations.load_category_ids
+            cache=step_cache,
+            inputs=[source_file('attributes.json')],
+            config={
+                'attributes': registry.attributes.digest(),
+                'extended_attributes': registry.extended_attributes.digest()
+            },
+            report=report
         )
-        logger.info("Category localizations: OK")
-
-        # Process attribute localizations
-        logger.info("Step 11: Attribute localizations")
-        attribute_localizations_data = scripts.utils.process_step(
-            "attribute localizations",
-            lambda yaml_dir, id_loader: extract_all_localizations('attribute', f'data/input/{version}/dist', id_loader),
-            lambda data: write_localizations(data, 'attribute'),
-            f'data/input/{version}/dist',
-            scripts.localizations.load_attribute_ids
-        )
-        logger.info("Attribute localizations: OK")
-
-        # Process attribute value localizations
-        logger.info("Step 12: Attribute value localizations")
-        value_localizations_data = scripts.utils.process_step(
-            "attribute value localizations",
-            lambda yaml_dir, id_loader: extract_all_localizations('value', f'data/input/{version}/dist', id_loader),
-            lambda data: write_localizations(data, 'attribute_value'),
-            f'data/input/{version}/dist',
-            scripts.localizations.load_value_ids
+
+    # Localization rows per entity type, kept for the search index
+    localized = {}
+
+    def localization_writer(output_type, entity_ids):
+        def write(data):
+            if search_index:
+                localized[output_type] = data
+            write_localizations(data, output_type, entity_ids if wide_localizations else None, resolved=bool(fallbacks))
+        return write
+
+    # Localizations are cached per language inside the extract functions
+    def localizations(entity_type, output_type, entity_ids):
+        return lambda: scripts.utils.process_step(
+            f"{output_type.replace('_', ' ')} localizations",
+            extract_all_localizations,
+            localization_writer(output_type, entity_ids),
+            entity_type,
+            taxonomy.dist_dir,
+            entity_ids,
+            workers,
+            cache,
+            ledger_ids(f'localizations_{output_type}'),
+            fallbacks,
+            report=report
         )
-        logger.info("Attribute value localizations: OK")
 
-        # Process vertical localizations
-        logger.info("Step 13: Vertical localizations")
-        vertical_localizations_data = scripts.utils.process_step(
+    def vertical_localizations():
+        return scripts.utils.process_step(
             "vertical localizations",
-            lambda yaml_dir, _: scripts.localizations.extract_all_vertical_localizations(
-                f'data/input/{version}/dist',
-                language_codes,
-                version
-            ),
-            lambda data: write_localizations(data, 'vertical'),
-            f'data/input/{version}/dist',
-            lambda x: None  # Dummy loader since we don't need it
+            scripts.localizations.extract_all_vertical_localizations,
+            localization_writer('vertical', registry.verticals),
+            taxonomy,
+            registry.verticals,
+            language_codes,
+            workers,
+            cache,
+            ledger_ids('localizations_vertical'),
+            fallbacks,
+            report=report
         )
-        logger.info("Vertical localizations: OK")
 
-        # Process extended attribute localizations
-        logger.info("Step 14: Extended attribute localizations")
-        extended_attribute_localizations_data = scripts.utils.process_step(
+    def extended_attribute_localizations():
+        return scripts.utils.process_step(
             "extended attribute localizations",
-            lambda yaml_dir, _: scripts.localizations.extract_all_extended_attribute_localizations(
-                f'data/input/{version}/dist',
-                language_codes,
-                version
-            ),
-            lambda data: write_localizations(data, 'extended_attribute'),
-            f'data/input/{version}/dist',
-            lambda x: None  # Dummy loader since we don't need it
+            scripts.localizations.extract_all_extended_attribute_localizations,
+            localization_writer('extended_attribute', registry.extended_attributes),
+            taxonomy,
+            registry.extended_attributes,
+            language_codes,
+            workers,
+            cache,
+            ledger_ids('localizations_extended_attribute'),
+            fallbacks,
+            report=report
+        )
+
+    def build_search_index():
+        # Built from the registry and the localization rows in memory, so it covers every name in every language
+        return scripts.utils.process_step(
+            "search index",
+            lambda: scripts.search_index.build_search_index(registry, localized, source_language_code),
+            lambda index: index.save(f'{output_root}/{version}/search_index.pickle'),
+            report=report
+        )
+
+    Step = scripts.scheduler.Step
+    steps = [
+        Step("verticals", verticals, outputs=['verticals']),
+        Step("categories", categories, inputs=['verticals'], outputs=['categories', 'category_nested_set', 'category_closure']),
+        Step("attributes", attributes, outputs=['attributes', 'extended_attributes']),
+        Step("attribute values", attribute_values, outputs=['attribute_values']),
+        Step("mappings", mappings,
+             inputs=['attributes', 'attribute_values'], outputs=['attribute_value_mappings']),
+        Step("category-attribute mappings", category_attribute_mappings,
+             inputs=['categories', 'attributes', 'extended_attributes'],
+             outputs=['category_attribute_mappings', 'category_effective_attributes']),
+        Step("attribute-extended attribute mappings", attribute_extended_mappings,
+             inputs=['attributes', 'extended_attributes'], outputs=['attribute_extended_mappings']),
+        Step("category localizations", localizations('category', 'category', registry.categories),
+             inputs=['categories'], outputs=['localizations_category']),
+        Step("attribute localizations", localizations('attribute', 'attribute', registry.attributes),
+             inputs=['attributes'], outputs=['localizations_attribute']),
+        Step("attribute value localizations", localizations('value', 'attribute_value', registry.attribute_values),
+             inputs=['attribute_values'], outputs=['localizations_attribute_value']),
+        Step("vertical localizations", vertical_localizations,
+             inputs=['verticals'], outputs=['localizations_vertical']),
+        Step("extended attribute localizations", extended_attribute_localizations,
+             inputs=['extended_attributes'], outputs=['localizations_extended_attribute']),
+    ]
+    if search_index:
+        steps.append(Step(
+            "search index", build_search_index,
+            inputs=['verticals', 'categories', 'attributes', 'extended_attributes', 'attribute_values',
+                    'localizations_vertical', 'localizations_category', 'localizations_attribute',
+                    'localizations_extended_attribute', 'localizations_attribute_value'],
+            outputs=['search_index']
+        ))
+    return steps
+
+def run_version(args, version_name):
+    """Convert one taxonomy version with the configuration parsed from the command line."""
+    global version, language_codes, source_language_code, output_root
+    version = version_name
+    language_codes = args.languages
+    source_language_code = args.source_language
+    output_root = args.output_dir
+    logger = logging.getLogger(__name__)
+
+    # Every source-language dist file is decoded once and shared by all steps below, or streamed per step
+    taxonomy = scripts.taxonomy.Taxonomy(version, source_language_code, streaming=args.stream)
+    # Serial ids are registered as entities are extracted and looked up by later steps
+    registry = scripts.registry.IdRegistry()
+    # Entity ids are kept stable across versions when an id ledger is given
+    ledger = scripts.id_ledger.IdLedger(args.id_ledger) if args.id_ledger else None
+    # Step results are reused while their inputs, config and code are unchanged
+    cache = None
+    if not args.no_cache:
+        cache = scripts.cache.StepCache(
+            args.cache_dir,
+            {'version': version, 'source_language_code': source_language_code}
         )
-        logger.info("Extended attribute localizations: OK")
+
+    try:
+        # Add version check
+        logger.info("Version check")
+        check_version_consistency(taxonomy, source_language_code, cache)
+        logger.info("Version check: OK")
+        
+        # Fail before the pipeline runs rather than after the output is written
+        if args.delta_from and not os.path.isdir(f'{output_root}/{args.delta_from}'):
+            raise FileNotFoundError(f"Output of --delta-from version not found: {output_root}/{args.delta_from}")
+
+        # Create output directories
+        ensure_output_directories()
+        os.makedirs(f'{output_root}/{version}/localizations', exist_ok=True)
+
+        if args.sqlite:
+            output_sinks.append(scripts.sqlite_export.SqliteSink(version_path(args.sqlite)))
+        if args.postgres:
+            output_sinks.append(scripts.postgres_export.PostgresSink(version_path(args.postgres), args.postgres_format))
+        if args.arrow:
+            output_sinks.append(scripts.arrow_export.ArrowSink(
+                version_path(args.arrow), [source_language_code] + language_codes, args.arrow_format
+            ))
+        if args.shard_by_vertical:
+            output_sinks.append(scripts.shard_export.VerticalShardSink(f'{output_root}/{version}/shards'))
+        if args.binary:
+            output_sinks.append(scripts.binary_export.BinarySink(f'{output_root}/{version}/binary'))
+
+        report = None
+        if args.report or args.profile:
+            report = scripts.instrumentation.RunReport(
+                {
+                    'version': version,
+                    'source_language_code': source_language_code,
+                    'language_codes': language_codes,
+                    'workers': args.workers,
+                    'jobs': args.jobs,
+                    'stream': args.stream,
+                    'cache': not args.no_cache,
+                },
+                profile_dir=version_path(args.profile),
+                trace_memory=args.trace_memory
+            )
+        jobs = args.jobs
+        if args.profile and jobs > 1:
+            # Steps are profiled one at a time so each profile only holds its own step
+            logger.warning("--profile runs the steps one at a time")
+            jobs = 1
+
+        steps = build_steps(
+            taxonomy, registry, args.workers, cache, report, ledger, args.wide_localizations,
+            scripts.localizations.available_fallbacks(args.fallback, taxonomy.dist_dir),
+            args.search_index
+        )
+        selected = scripts.scheduler.select_steps(steps, args.only, args.skip)
+
+        # Localization steps share one pool of worker processes, started before any scheduler thread
+        if args.workers > 1:
+            scripts.localizations.start_language_pool(args.workers)
+        # Run the remaining steps as soon as the artifacts they read are available
+        scripts.scheduler.run_steps(selected, jobs)
+
+        # Only a complete run retires the ids of entities missing from this version
+        if ledger:
+            if len(selected) == len(steps):
+                ledger.retire_missing(registry)
+            ledger.save()
+
+        for sink in output_sinks:
+            sink.close()
+
+        if args.delta_from:
+            scripts.delta.export_delta(
+                f'{output_root}/{args.delta_from}',
+                f'{output_root}/{version}',
+                f'{output_root}/{version}/delta/{args.delta_from}'
+            )
+
+        if report and args.report:
+            report.write(version_path(args.report))
+            logger.info(f"Run report written: {version_path(args.report)}")
 
         logger.info("All steps completed successfully")
 
     except Exception as e:
         logger.error(f"An error occurred: {str(e)}")
+        for sink in output_sinks:
+            sink.abort()
         raise
+    finally:
+        scripts.localizations.shutdown_language_pool()
+        output_sinks.clear()
+
+# Command-line arguments shared by the versions converted in a worker process, set once per process
+_version_args = None
+
+def _init_version_worker(args):
+    global _version_args
+    _version_args = args
+
+def _run_version_task(version_name):
+    setup_logging(version_name)
+    run_version(_version_args, version_name)
+    return version_name
+
+def run_versions(args):
+    """
+    Convert several versions, each in its own process. With an id ledger the
+    versions are converted one after another in the order given, since each
+    one allocates ids from the ledger state the previous one left.
+    """
+    logger = logging.getLogger(__name__)
+    jobs = min(args.version_jobs or os.cpu_count() or 1, len(args.versions))
+    if args.id_ledger and jobs > 1:
+        logger.warning("--id-ledger converts the versions one at a time, in the order given")
+        jobs = 1
+
+    failed = []
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_version_worker, initargs=(args,)) as executor:
+        if args.id_ledger:
+            # A failed version stops the run, the later ones would allocate from its ledger state
+            for version_name in args.versions:
+                executor.submit(_run_version_task, version_name).result()
+                logger.info(f"Version {version_name}: OK")
+        else:
+            futures = {executor.submit(_run_version_task, version_name): version_name for version_name in args.versions}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                    logger.info(f"Version {futures[future]}: OK")
+                except Exception as e:
+                    logger.error(f"Version {futures[future]} failed: {e}")
+                    failed.append(futures[future])
+    if failed:
+        raise RuntimeError(f"Versions failed: {', '.join(sorted(failed))}")
+    logger.info(f"All {len(args.versions)} versions converted")
+
+def main(argv=None):
+    args = parse_args(argv)
+    setup_logging()
+    cache = scripts.cache.StepCache(args.cache_dir)
+    if args.clear_cache:
+        cache.clear()
+    if len(args.versions) == 1:
+        run_version(args, args.versions[0])
+    else:
+        run_versions(args)
+    # Results of other versions and older code are never looked up again
+    if not args.no_cache:
+        cache.prune(args.cache_max_age * 86400)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,124 @@
+import logging
+import os
+import threading
+from scripts.schema import is_integer_column, to_integer
+
+# Rows buffered per table before they are written as one row group / record batch
+ROW_GROUP_SIZE = 65536
+# Low-cardinality string columns stored dictionary-encoded
+DICTIONARY_COLUMNS = {'language_code'}
+FILE_EXTENSIONS = {'parquet': 'parquet', 'ipc': 'arrow'}
+
+def import_pyarrow():
+    """Import pyarrow on first use, it is only needed for --arrow."""
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as e:
+        raise RuntimeError("--arrow needs the pyarrow package: pip install pyarrow") from e
+    return pyarrow
+
+def arrow_schema(pa, fieldnames):
+    """Nullable int32 for ids and other integer columns, dictionary-encoded language codes, text otherwise."""
+    fields = []
+    for column in fieldnames:
+        if is_integer_column(column):
+            field_type = pa.int32()
+        elif column in DICTIONARY_COLUMNS:
+            field_type = pa.dictionary(pa.int8(), pa.string())
+        else:
+            field_type = pa.string()
+        fields.append(pa.field(column, field_type))
+    return pa.schema(fields)
+
+class ArrowTable:
+    def __init__(self, pa, path, fieldnames, file_format, dictionaries):
+        self.pa = pa
+        self.fieldnames = list(fieldnames)
+        self.dictionaries = dictionaries
+        self.integer_columns = [is_integer_column(column) for column in self.fieldnames]
+        self.schema = arrow_schema(pa, self.fieldnames)
+        self.columns = [[] for _ in self.fieldnames]
+        self.buffered = 0
+        if file_format == 'parquet':
+            self.writer = pa.parquet.ParquetWriter(path, self.schema, compression='zstd')
+        else:
+            self.writer = pa.ipc.new_file(path, self.schema)
+
+    def write(self, rows):
+        for column, integer, values in zip(self.fieldnames, self.integer_columns, self.columns):
+            if integer:
+                values.extend(to_integer(row.get(column)) for row in rows)
+            else:
+                values.extend(row.get(column) for row in rows)
+        self.buffered += len(rows)
+        if self.buffered >= ROW_GROUP_SIZE:
+            self.flush()
+
+    def flush(self):
+        if not self.buffered:
+            return
+        batch = self.pa.RecordBatch.from_arrays(
+            [
+                self.dictionary_array(field, values)
+                if self.pa.types.is_dictionary(field.type)
+                else self.pa.array(values, type=field.type)
+                for values, field in zip(self.columns, self.schema)
+            ],
+            schema=self.schema
+        )
+        self.writer.write_batch(batch)
+        self.columns = [[] for _ in self.fieldnames]
+        self.buffered = 0
+
+    def dictionary_array(self, field, values):
+        # Every batch uses the same dictionary, IPC files cannot replace it between batches
+        dictionary, positions = self.dictionaries[field.name]
+        try:
+            indices = [None if value is None else positions[value] for value in values]
+        except KeyError as e:
+            raise ValueError(f"Value {e} of column {field.name} is not one of {dictionary.to_pylist()}") from None
+        return self.pa.DictionaryArray.from_arrays(self.pa.array(indices, type=field.type.index_type), dictionary)
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+class ArrowSink:
+    """
+    Writes every table as a typed columnar file: Parquet (zstd) or Arrow IPC.
+
+    Rows are converted in batches of ROW_GROUP_SIZE, so memory stays bounded
+    for large tables. language_code is encoded against the fixed list of
+    language codes, so all batches share one dictionary. pyarrow is imported
+    when the sink is created.
+    """
+
+    def __init__(self, output_dir, language_codes, file_format='parquet'):
+        if file_format not in FILE_EXTENSIONS:
+            raise ValueError(f"Unknown columnar format: {file_format}")
+        self.pa = import_pyarrow()
+        codes = list(dict.fromkeys(language_codes))
+        self.dictionaries = {
+            'language_code': (self.pa.array(codes, type=self.pa.string()), {code: i for i, code in enumerate(codes)}),
+        }
+        self.output_dir = output_dir
+        self.file_format = file_format
+        self.tables = []
+        self._lock = threading.Lock()
+        os.makedirs(output_dir, exist_ok=True)
+
+    def table(self, name, fieldnames):
+        with self._lock:
+            self.tables.append(name)
+        path = os.path.join(self.output_dir, f'{name}.{FILE_EXTENSIONS[self.file_format]}')
+        return ArrowTable(self.pa, path, fieldnames, self.file_format, self.dictionaries)
+
+    def close(self):
+        logging.getLogger(__name__).info(
+            f"Columnar files written: {self.output_dir} ({len(self.tables)} tables, {self.file_format})"
+        )
+
+    def abort(self):
+        pass
@@ -1,20 +1,16 @@
-import json
-
-def extract_attribute_values(json_file_path):
-    with open(json_file_path, 'r', encoding='utf-8') as file:
-        data = json.load(file)
-
-    values = []
+def iter_attribute_values(data, ids=None):
+    # ids maps a shopify id to its serial id (e.g. an IdLedger entry), by default ids follow the dist order
     for i, value in enumerate(data.get('values', []), 1):
         shopify_uri = value.get('id')
         shopify_id = shopify_uri.split('/')[-1] if shopify_uri else None
         
-        values.append({
-            'id': i,
+        yield {
+            'id': ids(shopify_id) if ids else i,
             'shopify_id': shopify_id,
             'shopify_uri': shopify_uri,
             'name': value.get('name'),
             'handle': value.get('handle')
-        })
+        }
 
-    return values
\ No newline at end of file
+def extract_attribute_values(data, ids=None):
+    return list(iter_attribute_values(data, ids))
\ No newline at end of file
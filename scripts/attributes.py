@@ -1,37 +1,45 @@
-import json
+def iter_attributes_and_extended(data, attribute_ids=None, extended_attribute_ids=None):
+    """
+    Return (attributes, extended_attributes) iterators built in a single pass.
+    extended_attributes is filled while attributes is consumed, so it has to be
+    iterated after attributes is exhausted.
 
-def extract_attributes_and_extended(json_file_path):
-    with open(json_file_path, 'r', encoding='utf-8') as file:
-        data = json.load(file)
-
-    attributes = []
+    attribute_ids and extended_attribute_ids map a shopify id or handle to its
+    serial id (e.g. an IdLedger entry), by default serial ids follow the dist order.
+    """
     # Use a dictionary to store unique extended attributes (handle as key to ensure uniqueness)
     extended_attrs_dict = {}
-    
-    for i, attribute in enumerate(data.get('attributes', []), 1):
-        # Process main attributes
-        attributes.append({
-            'id': i,
-            'name': attribute.get('name'),
-            'handle': attribute.get('handle'),
-            'description': attribute.get('description'),
-            'shopify_id': attribute.get('id').split('/')[-1],  # Extract the ID from the URI
-            'shopify_uri': attribute.get('id')  # Store the full URI
-        })
-        
-        # Collect extended attributes
-        for ext_attr in attribute.get('extended_attributes', []):
-            handle = ext_attr.get('handle')
-            if handle and handle not in extended_attrs_dict:
-                extended_attrs_dict[handle] = {
-                    'name': ext_attr.get('name'),
-                    'handle': handle
-                }
-    
-    # Convert extended attributes dictionary to list with serial IDs
-    extended_attributes = [
-        {'id': i, **attr_data}
-        for i, attr_data in enumerate(extended_attrs_dict.values(), 1)
-    ]
-    
-    return attributes, extended_attributes
\ No newline at end of file
+
+    def attributes():
+        for i, attribute in enumerate(data.get('attributes', []), 1):
+            # Process main attributes
+            shopify_id = attribute.get('id').split('/')[-1]  # Extract the ID from the URI
+            yield {
+                'id': attribute_ids(shopify_id) if attribute_ids else i,
+                'name': attribute.get('name'),
+                'handle': attribute.get('handle'),
+                'description': attribute.get('description'),
+                'shopify_id': shopify_id,
+                'shopify_uri': attribute.get('id')  # Store the full URI
+            }
+            
+            # Collect extended attributes
+            for ext_attr in attribute.get('extended_attributes', []):
+                handle = ext_attr.get('handle')
+                if handle and handle not in extended_attrs_dict:
+                    extended_attrs_dict[handle] = {
+                        'name': ext_attr.get('name'),
+                        'handle': handle
+                    }
+
+    def extended_attributes():
+        # Serial IDs follow the order in which the extended attributes were first seen
+        for i, attr_data in enumerate(extended_attrs_dict.values(), 1):
+            yield {'id': extended_attribute_ids(attr_data['handle']) if extended_attribute_ids else i, **attr_data}
+
+    return attributes(), extended_attributes()
+
+def extract_attributes_and_extended(data, attribute_ids=None, extended_attribute_ids=None):
+    attributes, extended_attributes = iter_attributes_and_extended(data, attribute_ids, extended_attribute_ids)
+    attributes = list(attributes)
+    return attributes, list(extended_attributes)
\ No newline at end of file
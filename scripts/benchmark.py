@@ -0,0 +1,214 @@
+import argparse
+import json
+import logging
+import os
+import shutil
+import statistics
+import time
+from scripts.localizations import read_translations_by_position
+from scripts.registry import EntityIndex
+from scripts.synthetic_taxonomy import generate_dist
+
+TRANSLATION_FILES = ['categories.txt', 'attributes.txt', 'attribute_values.txt']
+
+def run_pipeline(version, language_codes, pipeline_args, report_path):
+    """Run main.main() once on a generated version and return (wall time, run report)."""
+    # main.py is imported here since it reads its configuration from module globals
+    import main
+
+    main.version = version
+    main.language_codes = language_codes
+    shutil.rmtree(f'data/output/{version}', ignore_errors=True)
+
+    started = time.perf_counter()
+    main.main(list(pipeline_args) + ['--report', report_path])
+    wall_time = time.perf_counter() - started
+
+    with open(report_path, 'r', encoding='utf-8') as f:
+        return wall_time, json.load(f)
+
+def summarize(runs):
+    """Median and minimum of the pipeline and of every step over repeated runs."""
+    pipeline_times = [wall_time for wall_time, _ in runs]
+    steps = {}
+    for _, report in runs:
+        for step in report['steps']:
+            steps.setdefault(step['step'], []).append(step)
+
+    return {
+        'pipeline': {
+            'median_s': round(statistics.median(pipeline_times), 6),
+            'min_s': round(min(pipeline_times), 6),
+            'peak_rss_bytes': max(report['peak_rss_bytes'] for _, report in runs),
+        },
+        'steps': {
+            name: {
+                'median_s': round(statistics.median(step['wall_time_s'] for step in measurements), 6),
+                'min_s': round(min(step['wall_time_s'] for step in measurements), 6),
+                'cpu_median_s': round(statistics.median(
+                    step['cpu_time_s'] + step['child_cpu_time_s'] for step in measurements
+                ), 6),
+                'output_rows': measurements[0]['output_rows_total'],
+            }
+            for name, measurements in steps.items()
+        },
+    }
+
+def read_translations_line_by_line(file_path, entity_ids):
+    """Reference parser: the .txt file read and split one line at a time, as before the bulk reader."""
+    translations = {}
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.startswith('#') or ' : ' not in line:
+                continue
+            uri, translation = line.split(' : ', 1)
+            uri = uri.strip()
+            translation = translation.strip()
+            if uri and translation:
+                translations[uri] = translation
+    return [translations.get(uri) for uri in entity_ids.uris.values()]
+
+def translation_entities(dist_dir, source_language_code):
+    """Entity index per translation file, with the URIs listed in the source language file."""
+    indexes = {}
+    for file_name in TRANSLATION_FILES:
+        entity_ids = EntityIndex()
+        with open(f'{dist_dir}/{source_language_code}/{file_name}', 'r', encoding='utf-8') as f:
+            uris = [line.split(' : ', 1)[0].strip() for line in f if ' : ' in line and not line.startswith('#')]
+        entity_ids.register({'id': serial_id, 'shopify_uri': uri} for serial_id, uri in enumerate(uris, 1))
+        indexes[file_name] = entity_ids
+    return indexes
+
+def benchmark_translations(dist_dir, language_codes, source_language_code, repeat):
+    """
+    Time the bulk .txt reader against the line-by-line reference on every
+    translation file of every language, alternating the two per run. Both must
+    return the same translations.
+    """
+    indexes = translation_entities(dist_dir, source_language_code)
+    parsers = {'line by line': read_translations_line_by_line, 'bulk': read_translations_by_position}
+    times = {(file_name, name): [] for file_name in TRANSLATION_FILES for name in parsers}
+    for _ in range(repeat):
+        for file_name in TRANSLATION_FILES:
+            results = {}
+            for name, parse in parsers.items():
+                started = time.perf_counter()
+                results[name] = [parse(f'{dist_dir}/{lang}/{file_name}', indexes[file_name]) for lang in language_codes]
+                times[(file_name, name)].append(time.perf_counter() - started)
+            if results['bulk'] != results['line by line']:
+                raise AssertionError(f"Bulk and line-by-line translations of {file_name} differ")
+
+    summary = {}
+    for file_name in TRANSLATION_FILES:
+        reference = statistics.median(times[(file_name, 'line by line')])
+        bulk = statistics.median(times[(file_name, 'bulk')])
+        summary[file_name] = {
+            'entities': len(indexes[file_name]),
+            'line_by_line_median_s': round(reference, 6),
+            'bulk_median_s': round(bulk, 6),
+            'speedup': round(reference / bulk, 2),
+        }
+    return summary
+
+def format_translations(scale, counts, summary):
+    lines = [
+        f"{scale}x: translation files of {len(counts['languages']) - 1} languages",
+        f"  {'file':<24} {'entities':>10} {'line s':>10} {'bulk s':>10} {'speedup':>8}",
+    ]
+    for file_name, result in summary.items():
+        lines.append(
+            f"  {file_name:<24} {result['entities']:>10} {result['line_by_line_median_s']:>10.3f} "
+            f"{result['bulk_median_s']:>10.3f} {result['speedup']:>7.2f}x"
+        )
+    return '\n'.join(lines)
+
+def format_summary(scale, counts, summary):
+    lines = [
+        f"{scale}x: {counts['categories']} categories, {counts['attributes']} attributes, "
+        f"{counts['attribute_values']} values, {len(counts['languages'])} languages",
+        f"  {'step':<40} {'median s':>10} {'min s':>10} {'cpu s':>10} {'rows':>10}",
+    ]
+    for name, step in sorted(summary['steps'].items(), key=lambda item: -item[1]['median_s']):
+        lines.append(
+            f"  {name:<40} {step['median_s']:>10.3f} {step['min_s']:>10.3f} "
+            f"{step['cpu_median_s']:>10.3f} {step['output_rows']:>10}"
+        )
+    pipeline = summary['pipeline']
+    lines.append(
+        f"  {'full pipeline':<40} {pipeline['median_s']:>10.3f} {pipeline['min_s']:>10.3f} "
+        f"{'':>10} {'':>10}  peak RSS {pipeline['peak_rss_bytes'] / (1 << 20):.0f} MiB"
+    )
+    return '\n'.join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Time every pipeline step and the full pipeline on synthetic taxonomies. '
+                    'Arguments not listed here (e.g. --jobs 4 --stream) are passed to main.py.'
+    )
+    parser.add_argument('--scale', type=int, nargs='+', default=[1], help='Size factors to run, e.g. 1 10 100 (default: 1)')
+    parser.add_argument('--languages', type=int, default=2, help='Number of translated languages besides English (default: 2)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per size, the summary reports median and minimum (default: 3)')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the synthetic taxonomy (default: 0)')
+    parser.add_argument('--work-dir', default='data/benchmark', help='Directory for the generated dist and output (default: data/benchmark)')
+    parser.add_argument('--output', metavar='PATH', help='Also write the summary as JSON')
+    parser.add_argument(
+        '--scenario',
+        choices=['pipeline', 'translations'],
+        default='pipeline',
+        help='pipeline times main.py; translations times the bulk .txt translation reader against '
+             'a line-by-line parser, best with many --languages (default: pipeline)'
+    )
+    parser.add_argument('--verbose', action='store_true', help='Show the pipeline log')
+    args, pipeline_args = parser.parse_known_args(argv)
+
+    # Configured before main.py does, so the pipeline log stays quiet unless asked for
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+    # Cached step results would hide the work being measured
+    if '--no-cache' not in pipeline_args:
+        pipeline_args.append('--no-cache')
+
+    output_path = os.path.abspath(args.output) if args.output else None
+    os.makedirs(args.work_dir, exist_ok=True)
+    # main.py resolves data/input and data/output relative to the working directory.
+    # It is changed once, so worker processes of every run share it.
+    os.chdir(args.work_dir)
+
+    results = {}
+    for scale in args.scale:
+        version = f'synthetic-{scale}x-{args.languages}l-{args.seed}'
+        dist_dir = f'data/input/{version}/dist'
+        started = time.perf_counter()
+        shutil.rmtree(dist_dir, ignore_errors=True)
+        counts = generate_dist(dist_dir, version, scale, args.languages, args.seed)
+        generate_time = time.perf_counter() - started
+
+        language_codes = counts['languages'][1:]
+        if args.scenario == 'translations':
+            summary = benchmark_translations(dist_dir, language_codes, counts['languages'][0], args.repeat)
+            results[f'{scale}x'] = {'counts': counts, 'generate_s': round(generate_time, 6), 'translations': summary}
+            print(format_translations(scale, counts, summary), flush=True)
+            continue
+
+        runs = [
+            run_pipeline(version, language_codes, pipeline_args, f'data/report-{version}.json')
+            for _ in range(args.repeat)
+        ]
+        summary = summarize(runs)
+        results[f'{scale}x'] = {
+            'counts': counts,
+            'generate_s': round(generate_time, 6),
+            'pipeline_args': pipeline_args,
+            **summary,
+        }
+        print(format_summary(scale, counts, summary), flush=True)
+
+    if output_path:
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    return results
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+import json
+import logging
+import mmap
+import os
+import struct
+from array import array
+from scripts.schema import is_integer_column, to_integer
+
+# File layout: column sections (8-byte aligned), a JSON header describing them,
+# then a trailer with the header offset and length and the magic bytes.
+MAGIC = b'TAXB'
+FORMAT_VERSION = 2
+TRAILER = struct.Struct('<QI4s')
+# Integer columns are int64, missing values are stored as this sentinel
+NULL_INTEGER = -(1 << 63)
+# A string whose end offset has this bit set is NULL, so None and '' stay distinct
+NULL_STRING = 1 << 63
+# Columns with a sorted lookup index, when the table has them
+INDEXED_COLUMNS = ['id', 'shopify_id', 'handle', 'prefix']
+
+def string_key(offsets, heap, row):
+    """Sort key of a string cell: (False, b'') for NULL, (True, UTF-8 bytes) otherwise."""
+    end = offsets[row + 1]
+    if end & NULL_STRING:
+        return False, b''
+    return True, bytes(heap[offsets[row] & ~NULL_STRING:end])
+
+class BinaryTableWriter:
+    """Collects the rows of one table and writes the binary file when closed."""
+
+    def __init__(self, path, fieldnames):
+        self.path = path
+        self.fieldnames = list(fieldnames)
+        self.integer_columns = [is_integer_column(column) for column in self.fieldnames]
+        self.row_count = 0
+        self.data = []
+        for integer in self.integer_columns:
+            if integer:
+                self.data.append(array('q'))
+            else:
+                # Offsets into a UTF-8 string heap, one more than the number of rows
+                self.data.append((array('Q', [0]), bytearray()))
+
+    def write(self, rows):
+        for row in rows:
+            for column, integer, data in zip(self.fieldnames, self.integer_columns, self.data):
+                value = row.get(column)
+                if integer:
+                    value = to_integer(value)
+                    data.append(NULL_INTEGER if value is None else value)
+                else:
+                    offsets, heap = data
+                    if value is None:
+                        offsets.append(len(heap) | NULL_STRING)
+                    else:
+                        heap += str(value).encode('utf-8')
+                        offsets.append(len(heap))
+            self.row_count += 1
+
+    def sort_index(self, position):
+        """Row numbers sorted by the values of a column, for binary search."""
+        if self.integer_columns[position]:
+            values = self.data[position]
+            order = sorted(range(self.row_count), key=values.__getitem__)
+        else:
+            offsets, heap = self.data[position]
+            # NULLs sort first, apart from empty strings
+            order = sorted(range(self.row_count), key=lambda row: string_key(offsets, heap, row))
+        return array('I', order)
+
+    def close(self):
+        header = {'version': FORMAT_VERSION, 'rows': self.row_count, 'columns': [], 'indexes': {}}
+        with open(self.path, 'wb') as f:
+            def section(data):
+                # Sections start on 8-byte boundaries so they can be cast in place
+                f.write(b'\0' * (-f.tell() % 8))
+                offset = f.tell()
+                f.write(data)
+                return offset
+
+            for column, integer, data in zip(self.fieldnames, self.integer_columns, self.data):
+                if integer:
+                    header['columns'].append({'name': column, 'type': 'integer', 'data': section(data.tobytes())})
+                else:
+                    offsets, heap = data
+                    header['columns'].append({
+                        'name': column,
+                        'type': 'string',
+                        'offsets': section(offsets.tobytes()),
+                        'heap': section(bytes(heap)),
+                    })
+            for position, column in enumerate(self.fieldnames):
+                if column in INDEXED_COLUMNS:
+                    header['indexes'][column] = section(self.sort_index(position).tobytes())
+
+            encoded = json.dumps(header).encode('utf-8')
+            offset = section(encoded)
+            f.write(TRAILER.pack(offset, len(encoded), MAGIC))
+        self.data = []
+
+class BinarySink:
+    """
+    Writes every table as a compact binary file that BinaryTable reads through
+    mmap: int64 integer columns, UTF-8 string heaps with offsets (NULL marked
+    in the end offset), and sorted row indexes for id, shopify_id, handle and
+    prefix.
+    """
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.tables = []
+        os.makedirs(output_dir, exist_ok=True)
+
+    def table(self, name, fieldnames):
+        self.tables.append(name)
+        return BinaryTableWriter(os.path.join(self.output_dir, f'{name}.bin'), fieldnames)
+
+    def close(self):
+        logging.getLogger(__name__).info(f"Binary tables written: {self.output_dir} ({len(self.tables)} tables)")
+
+    def abort(self):
+        pass
+
+class BinaryTable:
+    """
+    Read-only view of a table written by BinarySink.
+
+    The file is mapped into memory and nothing is decoded up front: rows and
+    lookups are resolved from the mapped columns on access. Processes reading
+    the same file share its pages through the OS page cache.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buffer = memoryview(self._mmap)
+        header_offset, header_length, magic = TRAILER.unpack_from(buffer, len(buffer) - TRAILER.size)
+        if magic != MAGIC:
+            raise ValueError(f"Not a binary taxonomy table: {path}")
+        header = json.loads(bytes(buffer[header_offset:header_offset + header_length]))
+        if header['version'] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported binary table version {header['version']}: {path}")
+
+        self.row_count = header['rows']
+        self.fieldnames = [column['name'] for column in header['columns']]
+        self._columns = {}
+        for column in header['columns']:
+            if column['type'] == 'integer':
+                start = column['data']
+                self._columns[column['name']] = buffer[start:start + 8 * self.row_count].cast('q')
+            else:
+                start = column['offsets']
+                offsets = buffer[start:start + 8 * (self.row_count + 1)].cast('Q')
+                heap_start = column['heap']
+                heap_length = offsets[-1] & ~NULL_STRING
+                self._columns[column['name']] = (offsets, buffer[heap_start:heap_start + heap_length])
+        self._indexes = {
+            column: buffer[start:start + 4 * self.row_count].cast('I')
+            for column, start in header['indexes'].items()
+        }
+
+    def __len__(self):
+        return self.row_count
+
+    def close(self):
+        self._columns = {}
+        self._indexes = {}
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def value(self, column, row):
+        data = self._columns[column]
+        if isinstance(data, tuple):
+            offsets, heap = data
+            end = offsets[row + 1]
+            if end & NULL_STRING:
+                return None
+            return str(heap[offsets[row] & ~NULL_STRING:end], 'utf-8')
+        value = data[row]
+        return None if value == NULL_INTEGER else value
+
+    def row(self, row):
+        """Return the row at a position as a dict."""
+        if not 0 <= row < self.row_count:
+            raise IndexError(row)
+        return {column: self.value(column, row) for column in self.fieldnames}
+
+    def __iter__(self):
+        for row in range(self.row_count):
+            yield self.row(row)
+
+    def find(self, column, value):
+        """Return the position of the first row whose indexed column equals value, or None."""
+        order = self._indexes.get(column)
+        if order is None:
+            raise KeyError(f"Column {column} of {self.path} has no index")
+        data = self._columns[column]
+        if isinstance(data, tuple):
+            offsets, heap = data
+            key = (True, str(value).encode('utf-8'))
+            get = lambda row: string_key(offsets, heap, row)
+        else:
+            key = int(value)
+            get = data.__getitem__
+
+        low, high = 0, self.row_count
+        while low < high:
+            middle = (low + high) // 2
+            if get(order[middle]) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.row_count and get(order[low]) == key:
+            return order[low]
+        return None
+
+    def get(self, serial_id):
+        """Return the row with this serial id as a dict, or None."""
+        row = self.find('id', serial_id)
+        return None if row is None else self.row(row)
+
+    def id_for(self, column, value):
+        """Resolve e.g. a shopify_id or handle to its serial id, or None."""
+        row = self.find(column, value)
+        return None if row is None else self.value('id', row)
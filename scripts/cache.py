@@ -0,0 +1,129 @@
+import glob
+import hashlib
+import json
+import logging
+import os
+import pickle
+import shutil
+import threading
+import time
+
+def hash_file(path, chunk_size=1 << 20):
+    """Return the sha256 hex digest of a file, or None if it does not exist."""
+    if not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def code_version():
+    """
+    Digest of the extraction code: scripts/*.py and main.py, which declares how
+    every step builds its rows.
+    """
+    scripts_dir = os.path.dirname(os.path.abspath(__file__))
+    paths = sorted(glob.glob(os.path.join(scripts_dir, '*.py')))
+    paths.append(os.path.join(os.path.dirname(scripts_dir), 'main.py'))
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(os.path.basename(path).encode('utf-8'))
+        digest.update((hash_file(path) or '').encode('utf-8'))
+    return digest.hexdigest()
+
+class StepCache:
+    """
+    Content-addressed store for step results.
+
+    A result is stored under the fingerprint of everything it was computed
+    from: the step name, the hashes of its input files, its configuration and
+    the code version. When none of these change the stored result is reused.
+    Entries are touched when they are read, so prune() can drop the ones no
+    run has used for a while.
+    """
+
+    def __init__(self, cache_dir, config=None):
+        self.cache_dir = cache_dir
+        self.config = config or {}
+        self.code_version = code_version()
+        self._file_hashes = {}
+        self._lock = threading.Lock()
+
+    def file_hash(self, path):
+        # Files are hashed once per run unless they change on disk
+        try:
+            stat = os.stat(path)
+            signature = (stat.st_size, stat.st_mtime_ns)
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            cached = self._file_hashes.get(path)
+        if cached and cached[0] == signature:
+            return cached[1]
+        file_digest = hash_file(path)
+        with self._lock:
+            self._file_hashes[path] = (signature, file_digest)
+        return file_digest
+
+    def fingerprint(self, step_name, input_files=(), config=None):
+        material = {
+            'step': step_name,
+            'code': self.code_version,
+            'config': self.config,
+            'step_config': config or {},
+            'inputs': {path: self.file_hash(path) for path in input_files},
+        }
+        encoded = json.dumps(material, sort_keys=True, default=str).encode('utf-8')
+        return hashlib.sha256(encoded).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f'{key}.pickle')
+
+    def get(self, key):
+        """Return (True, value) for a stored result, (False, None) otherwise."""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return False, None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return True, value
+
+    def put(self, key, value):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file first so concurrent readers never see a partial entry
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def prune(self, max_age):
+        """Remove the entries not written or read for max_age seconds, returns (entries, bytes) removed."""
+        cutoff = time.time() - max_age
+        removed, freed = 0, 0
+        for path in glob.glob(os.path.join(self.cache_dir, '*', '*.pickle*')):
+            try:
+                stat = os.stat(path)
+                if stat.st_mtime < cutoff:
+                    os.remove(path)
+                    removed += 1
+                    freed += stat.st_size
+            except FileNotFoundError:
+                # Removed by a concurrent run
+                pass
+        if removed:
+            logging.getLogger(__name__).info(
+                f"Cache pruned: {removed} entries unused for {max_age / 86400:g} days ({freed / (1 << 20):.1f} MiB)"
+            )
+        return removed, freed
+
+    def clear(self):
+        """Remove every stored result."""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        logging.getLogger(__name__).info(f"Cache cleared: {self.cache_dir}")
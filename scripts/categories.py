@@ -1,23 +1,20 @@
-import json
-import csv
-
-def load_vertical_ids(version):
-    vertical_ids = {}
-    with open(f'data/output/{version}/verticals.csv', 'r', encoding='utf-8') as csvfile:
-        reader = csv.DictReader(csvfile)
-        for row in reader:
-            vertical_ids[row['prefix']] = row['id']
-    return vertical_ids
-
-def extract_categories(json_file_path, vertical_ids):
-    with open(json_file_path, 'r', encoding='utf-8') as file:
-        data = json.load(file)
-
-    categories = []
+import logging
+from scripts.hierarchy import category_links, iter_closure, nested_set_bounds
+
+def iter_categories(data, vertical_ids, unresolved=None, ids=None):
+    """
+    Yield categories with serial IDs in a single pass.
+
+    Parents listed before their children (as in the Shopify dist) are resolved
+    right away. Categories whose parent has not been seen yet get parent_id None
+    and are appended to `unresolved` as (category, parent_shopify_id).
+
+    ids maps a shopify id to its serial id (e.g. an IdLedger entry), by default
+    serial ids follow the dist order.
+    """
     shopify_to_serial_id = {}
     serial_id = 1
 
-    # First pass: Create categories with serial IDs and build mapping
     for vertical in data.get('verticals', []):
         vertical_prefix = vertical.get('prefix')
         vertical_id = vertical_ids.get(vertical_prefix)
@@ -25,25 +22,94 @@ def extract_categories(json_file_path, vertical_ids):
         for category in vertical.get('categories', []):
             shopify_uri = category.get('id')
             shopify_id = shopify_uri.split('/')[-1] if shopify_uri else None
+            parent_shopify_id = category.get('parent_id', '').split('/')[-1] if category.get('parent_id') else None
+            
+            category_id = ids(shopify_id) if ids else serial_id
             
             # Store mapping of shopify_id to serial_id
-            shopify_to_serial_id[shopify_id] = serial_id
+            shopify_to_serial_id[shopify_id] = category_id
             
-            categories.append({
-                'id': serial_id,
+            row = {
+                'id': category_id,
                 'shopify_id': shopify_id,
                 'shopify_uri': shopify_uri,
                 'level': category.get('level'),
                 'name': category.get('name'),
                 'full_name': category.get('full_name'),
-                'parent_shopify_id': category.get('parent_id', '').split('/')[-1] if category.get('parent_id') else None,
+                'parent_id': shopify_to_serial_id.get(parent_shopify_id) if parent_shopify_id else None,
                 'vertical_id': vertical_id
-            })
+            }
+            if parent_shopify_id and row['parent_id'] is None:
+                if unresolved is None:
+                    logging.getLogger(__name__).warning(
+                        f"Parent {parent_shopify_id} of category {shopify_id} is listed after it and is left empty"
+                    )
+                else:
+                    unresolved.append((row, parent_shopify_id))
+            yield row
             serial_id += 1
 
-    # Second pass: Update parent_id references
-    for category in categories:
-        parent_shopify_id = category.pop('parent_shopify_id')  # Remove the temporary field
-        category['parent_id'] = shopify_to_serial_id.get(parent_shopify_id) if parent_shopify_id else None
+def extract_categories(data, vertical_ids, ids=None):
+    unresolved = []
+    categories = list(iter_categories(data, vertical_ids, unresolved, ids))
+
+    # Second pass: Update parent_id references listed after their children
+    if unresolved:
+        shopify_to_serial_id = {category['shopify_id']: category['id'] for category in categories}
+        for category, parent_shopify_id in unresolved:
+            category['parent_id'] = shopify_to_serial_id.get(parent_shopify_id)
+
+    return categories
+
+def iter_nested_set(links, bounds):
+    """Yield the nested set rows (category_id, lft, rgt) in dist order, a subtree is the range lft..rgt."""
+    for category_id, _ in links:
+        lft, rgt = bounds[category_id]
+        yield {'category_id': category_id, 'lft': lft, 'rgt': rgt}
+
+def extract_category_hierarchy(data, vertical_ids, ids=None):
+    """Return the categories, their nested set rows and the closure table rows."""
+    categories = extract_categories(data, vertical_ids, ids)
+    links = category_links(categories)
+    return categories, list(iter_nested_set(links, nested_set_bounds(links))), list(iter_closure(links))
+
+def iter_category_hierarchy(load_data, vertical_ids, ids=None):
+    """
+    Streaming version of extract_category_hierarchy: load_data() is called once
+    for the ids and parents, which are all the nested set and closure rows need,
+    and once more when the categories are iterated.
+
+    Children listed before their parent are remembered by the parent's shopify
+    id during the first pass and resolved when it arrives, so parent_id matches
+    the non-streaming result. The second pass patches them in.
+    """
+    # Parent shopify id -> ids of the children waiting for it
+    waiting = {}
+    parents = {}
+
+    def first_pass():
+        unresolved = []
+        for category in iter_categories(load_data(), vertical_ids, unresolved, ids):
+            for child, parent_shopify_id in unresolved:
+                waiting.setdefault(parent_shopify_id, []).append(child['id'])
+            unresolved.clear()
+            for child_id in waiting.pop(category['shopify_id'], ()):
+                parents[child_id] = category['id']
+            yield category
+
+    links = category_links(first_pass())
+    if waiting:
+        logging.getLogger(__name__).warning(
+            f"Parents of {sum(len(children) for children in waiting.values())} categories not found "
+            f"({', '.join(sorted(waiting)[:5])}), their parent_id is left empty"
+        )
+    if parents:
+        links = [(category_id, parents.get(category_id, parent_id)) for category_id, parent_id in links]
+
+    def categories():
+        for category in iter_categories(load_data(), vertical_ids, [], ids):
+            if category['id'] in parents:
+                category['parent_id'] = parents[category['id']]
+            yield category
 
-    return categories
\ No newline at end of file
+    return categories(), iter_nested_set(links, nested_set_bounds(links)), iter_closure(links)
@@ -0,0 +1,167 @@
+import argparse
+import csv
+import logging
+import re
+import time
+import unicodedata
+from functools import lru_cache
+from scripts.utils import batched
+
+# Separators merchants use between breadcrumb levels
+SEPARATORS = re.compile(r'\s*(?:>|›|»|\|)\s*')
+NON_WORD = re.compile(r'[^\w\s]+')
+SPACES = re.compile(r'\s+')
+
+# Confidence of each kind of match, divided by the number of candidates when ambiguous
+CONFIDENCE = {
+    'exact': 1.0,   # the whole path is a category path
+    'tail': 0.9,    # the input ends with a whole category path, e.g. a shop prefix
+    'suffix': 0.8,  # the input is the end of a category path
+    'leaf': 0.5,    # only the last level matches a category name
+}
+
+NO_MATCH = (None, 'none', 0.0)
+
+def normalize_segment(segment):
+    segment = unicodedata.normalize('NFKC', segment).casefold().replace('&', ' and ')
+    return SPACES.sub(' ', NON_WORD.sub(' ', segment)).strip()
+
+def normalize_path(path):
+    """Split a breadcrumb into normalized levels, e.g. 'Apparel & Accessories > Shirts' -> ('apparel and accessories', 'shirts')."""
+    segments = (normalize_segment(segment) for segment in SEPARATORS.split(path or ''))
+    return tuple(segment for segment in segments if segment)
+
+class CategoryIndex:
+    """
+    Normalized category path index for batch categorization.
+
+    Built from category rows (id, full_name) as returned by extract_categories
+    and optionally localization rows (category_id, full_name) as returned by
+    extract_category_localizations, so breadcrumbs in every configured language
+    match. A path is matched as a whole first, then by its longest tail that is
+    a whole category path or the end of one, and finally by its last level.
+    Results of repeated inputs are cached.
+    """
+
+    def __init__(self, categories, localizations=(), cache_size=1 << 18):
+        # Whole normalized path -> category ids, and path tails of 1..n-1 levels -> category ids
+        self.paths = {}
+        self.tails = {}
+        self.depths = {}
+        for category in categories:
+            self.add(category['id'], category['full_name'])
+        for localization in localizations:
+            self.add(localization['category_id'], localization['full_name'])
+        self.match = lru_cache(maxsize=cache_size)(self._match)
+
+    def add(self, category_id, full_name):
+        segments = normalize_path(full_name)
+        if not segments:
+            return
+        category_id = int(category_id)
+        self.depths[category_id] = len(segments)
+        self.paths.setdefault(segments, set()).add(category_id)
+        for start in range(1, len(segments)):
+            self.tails.setdefault(segments[start:], set()).add(category_id)
+
+    def best(self, candidates):
+        # The most general candidate, then the lowest id, so results are deterministic
+        return min(candidates, key=lambda category_id: (self.depths[category_id], category_id))
+
+    def _match(self, path):
+        """Return (category_id, match kind, confidence) for one breadcrumb."""
+        segments = normalize_path(path)
+        for length in range(len(segments), 0, -1):
+            tail = segments[-length:]
+            candidates = self.paths.get(tail)
+            if candidates:
+                kind = 'exact' if length == len(segments) else 'tail'
+            else:
+                candidates = self.tails.get(tail)
+                if not candidates:
+                    continue
+                kind = 'suffix' if length > 1 else 'leaf'
+            return self.best(candidates), kind, round(CONFIDENCE[kind] / len(candidates), 4)
+        return NO_MATCH
+
+    def categorize(self, paths):
+        """Yield (category_id, match kind, confidence) for every path."""
+        match = self.match
+        for path in paths:
+            yield match(path)
+
+    @classmethod
+    def from_output(cls, output_dir, language_codes=None):
+        """Build the index from the categories.csv and localizations_category.csv written by main.py."""
+        with open(f'{output_dir}/categories.csv', 'r', newline='', encoding='utf-8') as f:
+            categories = list(csv.DictReader(f))
+        localizations = []
+        try:
+            with open(f'{output_dir}/localizations/localizations_category.csv', 'r', newline='', encoding='utf-8') as f:
+                localizations = [
+                    row for row in csv.DictReader(f)
+                    if language_codes is None or row['language_code'] in language_codes
+                ]
+        except FileNotFoundError:
+            logging.getLogger(__name__).warning(f"No category localizations in {output_dir}, matching English paths only")
+        return cls(categories, localizations)
+
+def categorize_csv(index, input_file, output_file, column, batch_size=10000):
+    """
+    Stream input_file through the index and write it to output_file with
+    category_id, match and confidence columns added. Returns the row count.
+    """
+    row_count = 0
+    with open(input_file, 'r', newline='', encoding='utf-8') as source, \
+            open(output_file, 'w', newline='', encoding='utf-8') as target:
+        reader = csv.reader(source)
+        header = next(reader, None)
+        if header is None:
+            raise ValueError(f"Empty input file: {input_file}")
+        if column not in header:
+            raise ValueError(f"Column '{column}' not found in {input_file}, columns: {', '.join(header)}")
+        position = header.index(column)
+
+        writer = csv.writer(target)
+        writer.writerow(header + ['category_id', 'match', 'confidence'])
+        width = len(header)
+
+        # Repeated breadcrumbs also reuse their formatted output fields
+        @lru_cache(maxsize=1 << 18)
+        def fields(path):
+            category_id, kind, confidence = index.match(path)
+            return ('' if category_id is None else str(category_id), kind, str(confidence))
+
+        for batch in batched(reader, batch_size):
+            for row in batch:
+                if len(row) < width:
+                    row.extend([''] * (width - len(row)))
+                row.extend(fields(row[position]))
+            writer.writerows(batch)
+            row_count += len(batch)
+    return row_count
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Map product breadcrumbs in a CSV file to category ids')
+    parser.add_argument('input', help='CSV file with a header row')
+    parser.add_argument('output', help='CSV file to write, the input columns plus category_id, match and confidence')
+    parser.add_argument('--column', default='category', help="Column holding the breadcrumb (default: 'category')")
+    parser.add_argument('--version', default='2025-06-unstable', help='Taxonomy version whose output in --output-dir is used (default: 2025-06-unstable)')
+    parser.add_argument('--output-dir', default='data/output', metavar='DIR', help='Directory main.py wrote the output to, as DIR/VERSION (default: data/output)')
+    parser.add_argument('--languages', nargs='+', help='Only match these localization languages (default: all in the output)')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    logger = logging.getLogger(__name__)
+
+    index = CategoryIndex.from_output(f'{args.output_dir}/{args.version}', args.languages)
+    started = time.perf_counter()
+    row_count = categorize_csv(index, args.input, args.output, args.column)
+    elapsed = time.perf_counter() - started
+    logger.info(
+        f"Categorized {row_count} rows in {elapsed:.2f}s ({row_count / max(elapsed, 1e-9):,.0f} rows/s, "
+        f"{index.match.cache_info().misses} distinct breadcrumbs)"
+    )
+
+if __name__ == "__main__":
+    main()
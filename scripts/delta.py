@@ -0,0 +1,164 @@
+import argparse
+import csv
+import json
+import logging
+import os
+from scripts.schema import TABLES
+from scripts.utils import write_csv
+
+# Entity tables first, every other table refers to them by serial id
+ENTITY_TABLES = ['verticals', 'categories', 'attributes', 'extended_attributes', 'attribute_values']
+
+def table_path(output_dir, table):
+    if table.startswith('localizations_'):
+        return f'{output_dir}/localizations/{table}.csv'
+    return f'{output_dir}/{table}.csv'
+
+def read_table(output_dir, table):
+    """Return (fieldnames, rows) of a table written by main.py, or (None, []) if it is missing."""
+    path = table_path(output_dir, table)
+    if not os.path.exists(path):
+        return None, []
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        return reader.fieldnames, list(reader)
+
+class VersionTables:
+    """The output tables of one version, with rows keyed by their natural key."""
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.fieldnames = {}
+        self.rows = {}
+        # Serial id -> natural key of every entity table
+        self.natural_ids = {}
+
+        for table in ENTITY_TABLES:
+            self.load(table)
+            key_columns = TABLES[table]['natural_key']
+            self.natural_ids[table] = {
+                row['id']: tuple(row[column] for column in key_columns)
+                for row in self.rows[table].values()
+            }
+        for table in TABLES:
+            if table not in self.rows:
+                self.load(table)
+
+    def load(self, table):
+        fieldnames, rows = read_table(self.output_dir, table)
+        self.fieldnames[table] = fieldnames
+        keyed = {}
+        duplicates = 0
+        for row in rows:
+            key = self.natural_key(table, row)
+            if key in keyed:
+                duplicates += 1
+            keyed[key] = row
+        if duplicates:
+            logging.getLogger(__name__).warning(
+                f"{table} in {self.output_dir}: {duplicates} rows share a natural key, the last one is kept"
+            )
+        self.rows[table] = keyed
+
+    def natural_key(self, table, row):
+        references = TABLES[table].get('references', {})
+        key = []
+        for column in TABLES[table]['natural_key']:
+            value = row[column]
+            if column in references:
+                # Missing references ('', 'NULL') stay as they are
+                value = self.natural_ids.get(references[column], {}).get(value, value)
+            key.append(value)
+        return tuple(key)
+
+def diff_table(old, new, table):
+    """
+    Compare one table of two versions by natural key.
+
+    Returns (upserts, deletes, counts): upserts are the added and changed rows
+    of the new version. deletes are the removed rows of the old version, plus
+    changed rows whose primary key moved, so applying the deletes before the
+    upserts leaves no stale rows behind.
+    """
+    old_rows, new_rows = old.rows[table], new.rows[table]
+    primary_key = TABLES[table].get('primary_key')
+    upserts, deletes = [], []
+    counts = {'added': 0, 'changed': 0, 'removed': 0, 'unchanged': 0}
+
+    for key, row in new_rows.items():
+        old_row = old_rows.get(key)
+        if old_row is None:
+            counts['added'] += 1
+            upserts.append(row)
+        elif old_row != row:
+            counts['changed'] += 1
+            upserts.append(row)
+            # Without a primary key a row is only found by all of its columns
+            if primary_key is None or any(old_row[column] != row[column] for column in primary_key):
+                deletes.append(old_row)
+        else:
+            counts['unchanged'] += 1
+
+    for key, old_row in old_rows.items():
+        if key not in new_rows:
+            counts['removed'] += 1
+            deletes.append(old_row)
+
+    return upserts, deletes, counts
+
+def export_delta(old_dir, new_dir, delta_dir):
+    """
+    Write `{table}.upsert.csv` and `{table}.delete.csv` for every table that
+    differs between the outputs in old_dir and new_dir, plus a summary.json
+    with the row counts. Delete files hold the primary key columns (all columns
+    for tables without one).
+    """
+    logger = logging.getLogger(__name__)
+    if not os.path.isdir(old_dir):
+        raise FileNotFoundError(f"Output of the previous version not found: {old_dir} (run main.py for it first)")
+
+    old, new = VersionTables(old_dir), VersionTables(new_dir)
+    summary = {}
+    for table in TABLES:
+        fieldnames = new.fieldnames[table] or old.fieldnames[table]
+        if fieldnames is None:
+            continue
+        upserts, deletes, counts = diff_table(old, new, table)
+        summary[table] = counts
+        if upserts:
+            write_csv(upserts, fieldnames, f'{delta_dir}/{table}.upsert.csv')
+        if deletes:
+            delete_fields = TABLES[table].get('primary_key') or (old.fieldnames[table] or fieldnames)
+            write_csv(
+                ({column: row[column] for column in delete_fields} for row in deletes),
+                delete_fields,
+                f'{delta_dir}/{table}.delete.csv'
+            )
+        if upserts or deletes:
+            logger.info(
+                f"{table}: {counts['added']} added, {counts['changed']} changed, "
+                f"{counts['removed']} removed, {counts['unchanged']} unchanged"
+            )
+
+    os.makedirs(delta_dir, exist_ok=True)
+    with open(f'{delta_dir}/summary.json', 'w', encoding='utf-8') as f:
+        json.dump({'old': old_dir, 'new': new_dir, 'tables': summary}, f, indent=2)
+    logger.info(f"Delta written: {delta_dir}")
+    return summary
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Write upsert and delete files between the outputs of two versions')
+    parser.add_argument('old_version', help='Version whose tables are currently loaded, read from data/output/{version}')
+    parser.add_argument('new_version', help='Version to update to')
+    parser.add_argument('--output', help='Directory for the delta files (default: data/output/{new_version}/delta/{old_version})')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    export_delta(
+        f'data/output/{args.old_version}',
+        f'data/output/{args.new_version}',
+        args.output or f'data/output/{args.new_version}/delta/{args.old_version}'
+    )
+
+if __name__ == "__main__":
+    main()
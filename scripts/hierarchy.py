@@ -0,0 +1,61 @@
+def walk(links):
+    """
+    Depth-first walk over a category tree given as (id, parent_id) pairs in dist order.
+
+    Yields ('enter', id, path) and ('exit', id, path), where path lists the ids
+    from the root down to the node. Children are visited in dist order. Nodes
+    whose parent is missing (or that are part of a cycle) are walked as roots.
+    """
+    children = {}
+    ids = []
+    for category_id, parent_id in links:
+        ids.append(category_id)
+        children.setdefault(parent_id, []).append(category_id)
+    known = set(ids)
+
+    visited = set()
+    roots = [category_id for category_id, parent_id in links if parent_id is None or parent_id not in known]
+    for root in roots + ids:
+        if root in visited:
+            continue
+        visited.add(root)
+        path = [root]
+        yield 'enter', root, path
+        # One iterator over the remaining children per level of the path
+        stack = [iter(children.get(root, ()))]
+        while stack:
+            child = next(stack[-1], None)
+            if child is None:
+                stack.pop()
+                yield 'exit', path[-1], path
+                path.pop()
+            elif child not in visited:
+                visited.add(child)
+                path.append(child)
+                yield 'enter', child, path
+                stack.append(iter(children.get(child, ())))
+
+def nested_set_bounds(links):
+    """Map every category id to its (lft, rgt) nested set bounds."""
+    bounds = {}
+    counter = 0
+    for event, category_id, _ in walk(links):
+        counter += 1
+        if event == 'enter':
+            bounds[category_id] = counter
+        else:
+            bounds[category_id] = (bounds[category_id], counter)
+    return bounds
+
+def iter_closure(links):
+    """
+    Yield the closure table rows (ancestor_id, descendant_id, depth) of the tree,
+    including every category as its own ancestor at depth 0.
+    """
+    for event, category_id, path in walk(links):
+        if event == 'enter':
+            for depth, ancestor_id in enumerate(reversed(path)):
+                yield {'ancestor_id': ancestor_id, 'descendant_id': category_id, 'depth': depth}
+
+def category_links(categories):
+    return [(category['id'], category['parent_id']) for category in categories]
@@ -0,0 +1,104 @@
+import hashlib
+import json
+import logging
+import os
+
+# Entity tables with ledger ids, named like their registry index
+ENTITY_TYPES = ['verticals', 'categories', 'attributes', 'extended_attributes', 'attribute_values']
+# Localization ids are keyed by '{entity id}:{language code}'
+LOCALIZATION_TYPES = [
+    'localizations_vertical',
+    'localizations_category',
+    'localizations_attribute',
+    'localizations_attribute_value',
+    'localizations_extended_attribute',
+]
+
+class EntityLedger:
+    """
+    Permanent serial ids of one entity type, keyed by shopify id, handle or prefix.
+
+    Calling the ledger with a key returns the id allocated to it, allocating the
+    next unused id for a key that was never seen. Retired ids are never handed
+    out to another key; an entity that comes back gets its old id again.
+    """
+
+    def __init__(self, next_id=1, ids=None, retired=None):
+        self.next_id = next_id
+        self.ids = ids or {}
+        self.retired = retired or {}
+        self.allocated = 0
+        # Keys looked up in this run
+        self.seen = set()
+
+    def __call__(self, key):
+        self.seen.add(key)
+        serial_id = self.ids.get(key)
+        if serial_id is None:
+            serial_id = self.retired.pop(key, None)
+            if serial_id is None:
+                serial_id = self.next_id
+                self.next_id += 1
+                self.allocated += 1
+            self.ids[key] = serial_id
+        return serial_id
+
+    def retire(self, present_keys):
+        """Retire the ids of keys that are not in present_keys, return how many were retired."""
+        missing = [key for key in self.ids if key not in present_keys]
+        for key in missing:
+            self.retired[key] = self.ids.pop(key)
+        return len(missing)
+
+    def digest(self):
+        """Fingerprint of the allocated ids, used as cache input by steps allocating from this ledger."""
+        digest = hashlib.sha256()
+        digest.update(repr((self.next_id, sorted(self.ids.items()), sorted(self.retired.items()))).encode('utf-8'))
+        return digest.hexdigest()
+
+    def as_dict(self):
+        return {'next_id': self.next_id, 'ids': self.ids, 'retired': self.retired}
+
+class IdLedger:
+    """
+    Serial id ledger of every entity type, stored as JSON and shared by all
+    taxonomy versions converted with it, so ids stay stable between releases.
+    On the first run ids are allocated in dist order, like the positional ids.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        data = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        self.entities = {
+            entity_type: EntityLedger(**data.get(entity_type, {}))
+            for entity_type in ENTITY_TYPES + LOCALIZATION_TYPES
+        }
+
+    def __getitem__(self, entity_type):
+        return self.entities[entity_type]
+
+    def retire_missing(self, registry):
+        """Retire the ids of entities and localizations that are not in this version."""
+        logger = logging.getLogger(__name__)
+        for entity_type, ledger in self.entities.items():
+            if entity_type in LOCALIZATION_TYPES:
+                present_keys = ledger.seen
+            else:
+                # Entity steps served from the cache allocate nothing, the registry has every entity
+                index = getattr(registry, entity_type)
+                present_keys = index.by_shopify_id if entity_type in ('categories', 'attributes', 'attribute_values') else index.by_handle
+            retired = ledger.retire(present_keys)
+            if ledger.allocated or retired:
+                logger.info(f"Id ledger {entity_type}: {ledger.allocated} allocated, {retired} retired")
+
+    def save(self):
+        """Write the ledger atomically, so an interrupted run keeps the previous one."""
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = f'{self.path}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({entity_type: ledger.as_dict() for entity_type, ledger in self.entities.items()}, f, indent=1)
+        os.replace(temp_path, self.path)
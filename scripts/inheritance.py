@@ -0,0 +1,87 @@
+import csv
+from types import MappingProxyType
+from scripts.hierarchy import walk
+from scripts.schema import to_integer
+
+EMPTY = MappingProxyType({})
+
+def collect_declared(mappings, declared):
+    """
+    Pass category-attribute mapping rows through while collecting the
+    (attribute_id, extended_attribute_id) pairs declared by each category.
+    A missing extended attribute ('NULL' in the mapping rows) is collected as None.
+    """
+    for row in mappings:
+        declared.setdefault(row['category_id'], []).append(
+            (row['attribute_id'], to_integer(row['extended_attribute_id']))
+        )
+        yield row
+
+class EffectiveAttributes:
+    """
+    Effective attributes of every category: the attributes declared on it and
+    on all of its ancestors.
+
+    Built in one top-down pass over the tree. Each category maps
+    (attribute_id, extended_attribute_id) to the topmost category on its path
+    that declares the pair. A category that declares nothing new shares its
+    parent's mapping instead of copying it, so deep verticals that repeat their
+    parents' attributes cost no extra memory. Lookups are O(1) and return a
+    read-only mapping.
+    """
+
+    def __init__(self, links, declared):
+        self._effective = {}
+        for event, category_id, path in walk(links):
+            if event != 'enter':
+                continue
+            inherited = self._effective[path[-2]] if len(path) > 1 else EMPTY
+            added = [pair for pair in declared.get(category_id, ()) if pair not in inherited]
+            if added:
+                effective = dict(inherited)
+                for pair in added:
+                    effective.setdefault(pair, category_id)
+                inherited = MappingProxyType(effective)
+            self._effective[category_id] = inherited
+
+    @classmethod
+    def from_output(cls, output_dir):
+        """Build the effective attributes from the categories.csv and category_attribute_mappings.csv written by main.py."""
+        with open(f'{output_dir}/categories.csv', 'r', newline='', encoding='utf-8') as f:
+            links = [(int(row['id']), to_integer(row['parent_id'])) for row in csv.DictReader(f)]
+        declared = {}
+        with open(f'{output_dir}/category_attribute_mappings.csv', 'r', newline='', encoding='utf-8') as f:
+            mappings = (
+                {
+                    'category_id': int(row['category_id']),
+                    'attribute_id': int(row['attribute_id']),
+                    'extended_attribute_id': row['extended_attribute_id'],
+                }
+                for row in csv.DictReader(f)
+            )
+            for _ in collect_declared(mappings, declared):
+                pass
+        return cls(links, declared)
+
+    def __getitem__(self, category_id):
+        return self._effective[category_id]
+
+    def __contains__(self, category_id):
+        return category_id in self._effective
+
+    def __len__(self):
+        return len(self._effective)
+
+    def get(self, category_id, default=EMPTY):
+        return self._effective.get(category_id, default)
+
+    def rows(self):
+        """Yield the effective attributes of every category, inherited ones first."""
+        for category_id, effective in self._effective.items():
+            for (attribute_id, extended_attribute_id), source_category_id in effective.items():
+                yield {
+                    'category_id': category_id,
+                    'attribute_id': attribute_id,
+                    'extended_attribute_id': extended_attribute_id,
+                    'source_category_id': source_category_id,
+                }
@@ -0,0 +1,153 @@
+import cProfile
+import json
+import os
+import resource
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# Metrics of the step running on the current thread, if it is being measured
+_current = threading.local()
+
+# Largest RSS reported by worker processes, which are not children of this process
+_worker_peak_rss = 0
+
+def max_rss_bytes(who=resource.RUSAGE_SELF):
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(who).ru_maxrss * 1024
+
+def _children_cpu_time():
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+def record_input(path):
+    """Count a file read by the current step."""
+    metrics = getattr(_current, 'metrics', None)
+    if metrics is not None:
+        try:
+            metrics['input_bytes'] += os.path.getsize(path)
+        except OSError:
+            pass
+
+def record_input_bytes(count):
+    metrics = getattr(_current, 'metrics', None)
+    if metrics is not None:
+        metrics['input_bytes'] += count
+
+def record_output(table, row_count):
+    """Count rows the current step wrote to a table."""
+    metrics = getattr(_current, 'metrics', None)
+    if metrics is not None:
+        metrics['output_rows'][table] = metrics['output_rows'].get(table, 0) + row_count
+
+def record_worker(cpu_time, max_rss):
+    """Count the CPU time of a task run by a worker process for the current step, and its RSS."""
+    global _worker_peak_rss
+    _worker_peak_rss = max(_worker_peak_rss, max_rss)
+    metrics = getattr(_current, 'metrics', None)
+    if metrics is not None:
+        metrics['worker_cpu_time_s'] = metrics.get('worker_cpu_time_s', 0) + cpu_time
+
+@contextmanager
+def capture_inputs():
+    """
+    Collect input bytes outside of a measured step, e.g. in a worker process.
+    Yields a dict whose 'input_bytes' is filled when the block exits.
+    """
+    previous = getattr(_current, 'metrics', None)
+    metrics = {'input_bytes': 0, 'output_rows': {}}
+    _current.metrics = metrics
+    try:
+        yield metrics
+    finally:
+        _current.metrics = previous
+
+class RunReport:
+    """
+    Per-step wall time, CPU time, memory, input bytes and output rows of one run,
+    written as JSON. Optionally dumps a cProfile file per step.
+
+    cpu_time_s is the CPU time of the step's thread; child_cpu_time_s is the CPU
+    time of the tasks worker processes ran for the step, plus that of child
+    processes that finished during it.
+
+    RSS is only known as a high-water mark of the whole process, so a step
+    reports process_peak_rss_bytes, the mark when it ended, and
+    peak_rss_growth_bytes, how far it raised the mark (0 for a step that stayed
+    below an earlier peak). With trace_memory, traced_peak_bytes is the peak of
+    Python allocations during the step and traced_growth_bytes the allocations
+    it left behind. All of them include steps running at the same time, and
+    none include worker processes: the run reports their largest RSS as
+    worker_peak_rss_bytes.
+    """
+
+    def __init__(self, config=None, profile_dir=None, trace_memory=False):
+        self.config = config or {}
+        self.profile_dir = profile_dir
+        self.trace_memory = trace_memory
+        self.steps = []
+        self.started_at = datetime.now(timezone.utc)
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+        if profile_dir:
+            os.makedirs(profile_dir, exist_ok=True)
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def measure(self, step_name):
+        metrics = {'step': step_name, 'input_bytes': 0, 'output_rows': {}}
+        _current.metrics = metrics
+        profiler = cProfile.Profile() if self.profile_dir else None
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            traced_started = tracemalloc.get_traced_memory()[0]
+        rss_started = max_rss_bytes()
+
+        wall_started = time.perf_counter()
+        cpu_started = time.thread_time()
+        children_started = _children_cpu_time()
+        if profiler:
+            profiler.enable()
+        try:
+            yield metrics
+        finally:
+            if profiler:
+                profiler.disable()
+            metrics['wall_time_s'] = round(time.perf_counter() - wall_started, 6)
+            metrics['cpu_time_s'] = round(time.thread_time() - cpu_started, 6)
+            metrics['child_cpu_time_s'] = round(
+                _children_cpu_time() - children_started + metrics.pop('worker_cpu_time_s', 0), 6
+            )
+            metrics['process_peak_rss_bytes'] = max_rss_bytes()
+            metrics['peak_rss_growth_bytes'] = metrics['process_peak_rss_bytes'] - rss_started
+            if self.trace_memory:
+                traced_current, traced_peak = tracemalloc.get_traced_memory()
+                metrics['traced_peak_bytes'] = traced_peak
+                metrics['traced_growth_bytes'] = traced_current - traced_started
+            metrics['output_rows_total'] = sum(metrics['output_rows'].values())
+            if profiler:
+                profile_path = os.path.join(self.profile_dir, f"{step_name.replace(' ', '_')}.prof")
+                profiler.dump_stats(profile_path)
+                metrics['profile'] = profile_path
+            _current.metrics = None
+            with self._lock:
+                self.steps.append(metrics)
+
+    def as_dict(self):
+        return {
+            'started_at': self.started_at.isoformat(),
+            'config': self.config,
+            'wall_time_s': round(time.perf_counter() - self._started, 6),
+            'peak_rss_bytes': max_rss_bytes(),
+            'worker_peak_rss_bytes': max(max_rss_bytes(resource.RUSAGE_CHILDREN), _worker_peak_rss),
+            'steps': self.steps,
+        }
+
+    def write(self, path):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.as_dict(), f, indent=2)
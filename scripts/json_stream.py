@@ -0,0 +1,172 @@
+import json
+
+_WHITESPACE = ' \t\n\r'
+
+class _Reader:
+    """Buffered character reader that decodes JSON values with bounded look-ahead."""
+
+    def __init__(self, file, chunk_size):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _read(self, size):
+        chunk = self.file.read(size)
+        if not chunk:
+            self.eof = True
+        # Drop what has been consumed so the buffer only holds the current value
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+
+    def peek(self):
+        """Return the next non-whitespace character without consuming it."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if self.eof:
+                raise ValueError("Unexpected end of JSON input")
+            self._read(self.chunk_size)
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected '{char}' but found '{found}' in JSON input")
+        self.pos += 1
+
+    def decode(self):
+        """Decode the next complete JSON value."""
+        self.peek()
+        # Keep some look-ahead so a number is never decoded from a cut-off prefix
+        while len(self.buf) - self.pos < 64 and not self.eof:
+            self._read(self.chunk_size)
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                # The value continues past the buffer, grow it geometrically
+                self._read(max(self.chunk_size, len(self.buf) - self.pos))
+                continue
+            if end == len(self.buf) and not self.eof:
+                # A number at the end of the buffer may be cut off
+                self._read(self.chunk_size)
+                continue
+            self.pos = end
+            return value
+
+def _lazy_object(reader, keys):
+    """
+    Parse an object up to the member keys[0], whose array is returned as an
+    iterator. Returns the object and a function that consumes the rest of it.
+    """
+    obj = {}
+    reader.expect('{')
+    while True:
+        char = reader.peek()
+        if char == '}':
+            reader.pos += 1
+            return obj, lambda: None
+        if char == ',':
+            reader.pos += 1
+            continue
+
+        key = reader.decode()
+        reader.expect(':')
+        if key != keys[0]:
+            obj[key] = reader.decode()
+            continue
+
+        items = _lazy_array(reader, keys[1:])
+        obj[key] = items
+
+        def finish():
+            # Skip whatever the consumer left of the array, then the remaining members
+            for _ in items:
+                pass
+            while True:
+                char = reader.peek()
+                reader.pos += 1
+                if char == '}':
+                    return
+                if char != ',':
+                    reader.pos -= 1
+                    reader.decode()
+                    reader.expect(':')
+                    reader.decode()
+
+        return obj, finish
+
+def _lazy_array(reader, keys):
+    reader.expect('[')
+    while True:
+        char = reader.peek()
+        if char == ']':
+            reader.pos += 1
+            return
+        if char == ',':
+            reader.pos += 1
+            continue
+
+        if keys:
+            item, finish = _lazy_object(reader, keys)
+            yield item
+            finish()
+        else:
+            yield reader.decode()
+
+def _closing(items, file):
+    try:
+        yield from items
+    finally:
+        file.close()
+
+def stream_json(json_file_path, keys, chunk_size=1 << 16):
+    """
+    Parse a JSON object incrementally, leaving the arrays along `keys` lazy.
+
+    stream_json(path, ('verticals', 'categories')) returns the top-level object
+    with 'verticals' as an iterator of vertical objects, each with 'categories'
+    as an iterator of category objects. Only one category is held in memory at
+    a time. Members listed after a lazy array are skipped, and the iterators
+    have to be consumed in document order.
+    """
+    file = open(json_file_path, 'r', encoding='utf-8')
+    try:
+        data, _ = _lazy_object(_Reader(file, chunk_size), keys)
+    except Exception:
+        file.close()
+        raise
+
+    if keys[0] in data:
+        data[keys[0]] = _closing(data[keys[0]], file)
+    else:
+        file.close()
+    return data
+
+def read_member(json_file_path, key, chunk_size=1 << 16):
+    """
+    Return the value of one top-level member of a JSON object, or None if it is
+    missing. Reading stops at the member, so a leading 'version' is found
+    without decoding the rest of the file.
+    """
+    with open(json_file_path, 'r', encoding='utf-8') as file:
+        reader = _Reader(file, chunk_size)
+        reader.expect('{')
+        while True:
+            char = reader.peek()
+            if char == '}':
+                return None
+            if char == ',':
+                reader.pos += 1
+                continue
+            name = reader.decode()
+            reader.expect(':')
+            value = reader.decode()
+            if name == key:
+                return value
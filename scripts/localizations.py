@@ -1,148 +1,107 @@
 import csv
 import yaml
 import os
+import re
 from typing import Dict, List
 import logging
-from collections import defaultdict
-import json
+import multiprocessing
+import pickle
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from operator import methodcaller
+from scripts import instrumentation
+from scripts.registry import EntityIndex
+from scripts.taxonomy import Taxonomy
 
-def load_translations(file_path: str, is_value: bool = False, is_category: bool = False) -> Dict:
-    """
-    Load translations from a .txt file in the format "URI : Translation"
-    """
-    logger = logging.getLogger(__name__)
-    
-    if not os.path.exists(file_path):
-        logger.error(f"Translation file not found: {file_path}")
-        return {}
-        
-    translations = {}
-    with open(file_path, 'r', encoding='utf-8') as f:
-        for line in f:
-            if line.startswith('#') or ' : ' not in line:
-                continue
-                
-            # Split on ' : ' to handle the format correctly
-            uri, translation = line.split(' : ', 1)
-            uri = uri.strip()
-            translation = translation.strip()
-            
-            if uri and translation:
-                if is_value:
-                    # For values, extract just the name part before the [Attribute]
-                    translation = translation.split('[')[0].strip()
-                elif is_category:
-                    # For categories, store both full name and name
-                    translation = {
-                        'full_name': translation,
-                        'name': translation.split(' > ')[-1].strip()
-                    }
-                translations[uri] = translation
-    
-    return translations
+# Splits a line at its first ' : ' separator, for map() over all lines of a file
+_split_translation = methodcaller('partition', ' : ')
 
 def load_yaml(file_path: str) -> Dict:
     with open(file_path, 'r', encoding='utf-8') as f:
         return yaml.safe_load(f)
 
-def load_category_ids(version):
-    category_ids = {}
-    with open(f'data/output/{version}/categories.csv', 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            handle = row['shopify_uri'].split('/')[-1]
-            category_ids[handle] = {
-                'id': row['id'],
-                'uri': row['shopify_uri']
-            }
-    return category_ids
+def read_translations_by_position(file_path: str, entity_ids: EntityIndex) -> List:
+    """
+    Parse a .txt translation file straight into a dense list indexed by the
+    position of each URI in entity_ids.uris, None where a translation is missing.
+    URIs are resolved through the index shared by all languages, so lines for
+    unknown URIs are skipped without stripping their translation.
+    """
+    positions, duplicates = entity_ids.uri_layout()
+    translations = [None] * len(entity_ids.uris)
+    if not os.path.exists(file_path):
+        logging.getLogger(__name__).error(f"Translation file not found: {file_path}")
+        return translations
 
-def load_attribute_ids(version):
-    attribute_ids = {}
-    with open(f'data/output/{version}/attributes.csv', 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            attribute_ids[row['handle']] = {
-                'id': row['id'],
-                'uri': row['shopify_uri']
-            }
-    return attribute_ids
+    instrumentation.record_input(file_path)
+    with open(file_path, 'r', encoding='utf-8') as f:
+        lines = [line for line in f.read().split('\n') if ' : ' in line and line[:1] != '#']
+    get_position = positions.get
+    for uri, _, translation in map(_split_translation, lines):
+        position = get_position(uri.strip())
+        if position is not None:
+            translation = translation.strip()
+            if translation:
+                translations[position] = translation
+    # Entities sharing a URI get the same translation
+    for position, first in duplicates:
+        translations[position] = translations[first]
+    return translations
 
-def load_value_ids(version):
-    value_ids = {}
-    with open(f'data/output/{version}/attribute_values.csv', 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            value_ids[row['handle']] = {
-                'id': row['id'],
-                'uri': row['shopify_uri']
-            }
-    return value_ids
-
-def load_extended_attribute_ids(version):
-    """Load extended attribute IDs from CSV"""
-    extended_attribute_ids = {}
-    with open(f'data/output/{version}/extended_attributes.csv', 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            extended_attribute_ids[row['handle']] = {
-                'id': row['id'],
-                'name': row['name']
-            }
-    return extended_attribute_ids
-
-def extract_category_localizations(dist_dir: str, category_ids: Dict, lang_code: str):
-    translations = load_translations(f'{dist_dir}/{lang_code}/categories.txt', is_category=True)
-    localizations = []
-    
-    for handle, info in category_ids.items():
-        if info['uri'] in translations:
-            translation = translations[info['uri']]
-            # Create single entry with both name and full_name
-            localizations.append({
-                'id': None,
-                'category_id': info['id'],
-                'language_code': lang_code,
-                'name': translation['name'],
-                'full_name': translation['full_name']
-            })
-    return localizations
+def extract_category_localizations(dist_dir: str, category_ids: EntityIndex, lang_code: str):
+    translations = read_translations_by_position(f'{dist_dir}/{lang_code}/categories.txt', category_ids)
+    
+    # Create single entry with both name and full_name
+    return [
+        {
+            'id': None,
+            'category_id': category_id,
+            'language_code': lang_code,
+            'name': full_name.rpartition(' > ')[2].strip(),
+            'full_name': full_name
+        }
+        for category_id, full_name in zip(category_ids.uris, translations)
+        if full_name is not None
+    ]
 
-def extract_attribute_localizations(dist_dir: str, attribute_ids: Dict, lang_code: str):
-    translations = load_translations(f'{dist_dir}/{lang_code}/attributes.txt')
-    localizations = []
-    
-    for handle, info in attribute_ids.items():
-        if info['uri'] in translations:
-            localizations.append({
-                'id': None,
-                'attribute_id': info['id'],
-                'language_code': lang_code,
-                'name': translations[info['uri']]
-            })
-    return localizations
+def extract_attribute_localizations(dist_dir: str, attribute_ids: EntityIndex, lang_code: str):
+    translations = read_translations_by_position(f'{dist_dir}/{lang_code}/attributes.txt', attribute_ids)
+    
+    return [
+        {
+            'id': None,
+            'attribute_id': attribute_id,
+            'language_code': lang_code,
+            'name': name
+        }
+        for attribute_id, name in zip(attribute_ids.uris, translations)
+        if name is not None
+    ]
 
-def extract_value_localizations(dist_dir: str, value_ids: Dict, lang_code: str):
-    translations = load_translations(f'{dist_dir}/{lang_code}/attribute_values.txt', is_value=True)
-    localizations = []
-    
-    for handle, info in value_ids.items():
-        if info['uri'] in translations:
-            localizations.append({
-                'id': None,
-                'attribute_value_id': info['id'],
-                'language_code': lang_code,
-                'name': translations[info['uri']]
-            })
-    return localizations
+def extract_value_localizations(dist_dir: str, value_ids: EntityIndex, lang_code: str):
+    translations = read_translations_by_position(f'{dist_dir}/{lang_code}/attribute_values.txt', value_ids)
+    
+    return [
+        {
+            'id': None,
+            'attribute_value_id': value_id,
+            'language_code': lang_code,
+            # Just the name part before the [Attribute]
+            'name': translation.partition('[')[0].strip()
+        }
+        for value_id, translation in zip(value_ids.uris, translations)
+        if translation is not None
+    ]
 
-def extract_extended_attribute_localizations(dist_dir: str, extended_attribute_ids: Dict, lang_code: str):
+def extract_extended_attribute_localizations(taxonomy: Taxonomy, extended_attribute_ids: EntityIndex, lang_code: str):
     """Extract extended attribute localizations from attributes.json"""
     logger = logging.getLogger(__name__)
     
     try:
-        with open(f'{dist_dir}/{lang_code}/attributes.json', 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = taxonomy.attributes(lang_code)
             
         # Create a mapping of handle to translated name
         translations = {}
@@ -157,11 +116,11 @@ def extract_extended_attribute_localizations(dist_dir: str, extended_attribute_i
     
     localizations = []
     
-    for handle, info in extended_attribute_ids.items():
+    for handle, extended_attribute_id in extended_attribute_ids.by_handle.items():
         if handle in translations:
             localizations.append({
                 'id': None,
-                'extended_attribute_id': info['id'],
+                'extended_attribute_id': extended_attribute_id,
                 'language_code': lang_code,
                 'name': translations[handle]
             })
@@ -252,13 +211,18 @@ def create_attribute_value_localizations(values_csv: str, yaml_file: str, output
                 ])
                 counter += 1
 
-def validate_translations(entity_type: str, translations: List[Dict], id_mapping: Dict, language_codes: List[str]):
+def _id_field(entity_type: str) -> str:
+    return 'attribute_value_id' if entity_type == 'value' else f'{entity_type}_id'
+
+def validate_translations(entity_type: str, translations: List[Dict], entity_ids: EntityIndex, language_codes: List[str], translation_counts: Counter = None):
     """
-    Validate translations and show missing entries if any
+    Validate translations and show missing entries if any.
+    translation_counts (entity id -> number of languages), as gathered by
+    merge_localizations, saves counting the translations again.
     """
     logger = logging.getLogger(__name__)
     
-    total_entities = len(id_mapping)
+    total_entities = len(entity_ids)
     expected_translations = total_entities * len(language_codes)
     actual_translations = len(translations)
     
@@ -266,143 +230,336 @@ def validate_translations(entity_type: str, translations: List[Dict], id_mapping
         logger.warning(f"{entity_type.title()} translations: {actual_translations} found, {expected_translations} expected")
         
         # Count translations per entity to find missing ones
-        translation_counts = defaultdict(int)
-        for trans in translations:
-            if entity_type == 'category':
-                entity_id = trans['category_id']
-            elif entity_type == 'attribute':
-                entity_id = trans['attribute_id']
-            else:  # attribute_value
-                entity_id = trans['attribute_value_id']
-            translation_counts[entity_id] += 1
+        if translation_counts is None:
+            id_field = _id_field(entity_type)
+            translation_counts = Counter(trans[id_field] for trans in translations)
         
         # Find entities with missing translations
         expected_count = len(language_codes)
         missing = []
-        for handle, info in id_mapping.items():
-            if translation_counts[info['id']] < expected_count:
-                missing.append(handle)
+        for entity_id in entity_ids.ids:
+            if translation_counts[entity_id] < expected_count:
+                missing.append(entity_id)
         
         # Show first few missing entries
         if missing:
             logger.warning("First 5 entities with missing translations:")
-            for handle in missing[:5]:
-                count = translation_counts[id_mapping[handle]['id']]
-                logger.warning(f"- {handle}: {count}/{expected_count} translations")
+            for entity_id in missing[:5]:
+                count = translation_counts[entity_id]
+                logger.warning(f"- {entity_ids.handles[entity_id]}: {count}/{expected_count} translations")
     
     return actual_translations < expected_translations
 
-def extract_all_localizations(entity_type, dist_dir, id_loader, language_codes, version):
+def wide_name_column(lang_code: str):
+    """Name column of a language in the wide table, a plain SQL identifier (pt-BR -> name_pt_br)."""
+    return 'name_' + re.sub(r'[^0-9a-z]+', '_', lang_code.lower()).strip('_')
+
+def pivot_localizations(localizations: List[Dict], id_field: str, entity_ids: EntityIndex, language_codes: List[str], source_language_code: str):
+    """
+    Return the fieldnames and rows of the wide localization table: one row per
+    entity with its name in the source language and in every language code,
+    e.g. category_id, name_en, name_fi, name_pt_br. Missing translations are left empty.
     """
-    Extract localizations for all configured languages for a given entity type
+    columns = {lang: wide_name_column(lang) for lang in language_codes}
+    source_column = wide_name_column(source_language_code)
+    rows = {
+        entity_id: {id_field: entity_id, source_column: entity_ids.names.get(entity_id)}
+        for entity_id in entity_ids.ids
+    }
+    for loc in localizations:
+        row = rows.get(loc[id_field])
+        if row is not None:
+            row[columns[loc['language_code']]] = loc['name']
+    fieldnames = [id_field, source_column] + [columns[lang] for lang in language_codes if lang != source_language_code]
+    return fieldnames, rows.values()
+
+# Process pool shared by the localization steps of a run, see start_language_pool
+_language_pool = None
+# Arguments of the steps whose tasks a worker process has run, by token, unpickled once per process
+_worker_args = {}
+
+def start_language_pool(workers: int):
+    """
+    Start the process pool every localization step of the run submits its
+    languages to, instead of each step starting its own. Workers are started
+    by a forkserver, so none is forked from a process running scheduler threads.
+    """
+    global _language_pool
+    _language_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('forkserver'))
+    return _language_pool
+
+def shutdown_language_pool():
+    global _language_pool
+    if _language_pool is not None:
+        _language_pool.shutdown()
+        _language_pool = None
+
+def _run_language_task(extract_func, token, payload, lang_code):
+    args = _worker_args.get(token)
+    if args is None:
+        args = _worker_args[token] = pickle.loads(payload)
+    # Input bytes and CPU time of the worker are reported back to the measured step
+    cpu_started = time.process_time()
+    with instrumentation.capture_inputs() as metrics:
+        localizations = extract_func(*args, lang_code)
+    return localizations, metrics['input_bytes'], time.process_time() - cpu_started, instrumentation.max_rss_bytes()
+
+def map_languages(extract_func, language_codes: List[str], workers: int, *args, cache=None, cache_inputs=None) -> List[List[Dict]]:
+    """
+    Call extract_func(*args, lang_code) for every language and return the results
+    in the order of language_codes. With more than one worker the languages are
+    spread over the run's language pool (or a pool of their own); the shared
+    arguments are unpickled once per worker process.
+
+    With a cache, cache_inputs(lang_code) returns the (input_files, config) a
+    language is fingerprinted with, and only languages without a stored result
+    are extracted.
+    """
+    results = {}
+    keys = {}
+    if cache is not None:
+        for lang in language_codes:
+            input_files, config = cache_inputs(lang)
+            keys[lang] = cache.fingerprint(f'{extract_func.__name__}:{lang}', input_files, config)
+            hit, localizations = cache.get(keys[lang])
+            if hit:
+                results[lang] = localizations
+    
+    missing = [lang for lang in language_codes if lang not in results]
+    if results:
+        logging.getLogger(__name__).info(
+            f"Reusing cached {extract_func.__name__} for {', '.join(lang for lang in language_codes if lang in results)}"
+        )
+    if workers <= 1 or len(missing) <= 1:
+        extracted = [extract_func(*args, lang) for lang in missing]
+    else:
+        # The shared arguments are pickled once and unpickled once per worker process
+        payload = pickle.dumps(args, protocol=pickle.HIGHEST_PROTOCOL)
+        token = uuid.uuid4().hex
+        executor = _language_pool or ProcessPoolExecutor(
+            max_workers=min(workers, len(missing)),
+            mp_context=multiprocessing.get_context('forkserver')
+        )
+        try:
+            extracted = []
+            for localizations, input_bytes, cpu_time, max_rss in executor.map(
+                _run_language_task, repeat(extract_func), repeat(token), repeat(payload), missing
+            ):
+                instrumentation.record_input_bytes(input_bytes)
+                instrumentation.record_worker(cpu_time, max_rss)
+                extracted.append(localizations)
+        finally:
+            if executor is not _language_pool:
+                executor.shutdown()
+    
+    for lang, localizations in zip(missing, extracted):
+        if cache is not None:
+            cache.put(keys[lang], localizations)
+        results[lang] = localizations
+    
+    return [results[lang] for lang in language_codes]
+
+def _entity_cache_inputs(file_path_template: str, entity_ids: EntityIndex):
+    """Fingerprint a language by its translation file and the ids it is matched against"""
+    entities_digest = entity_ids.digest()
+    return lambda lang: ([file_path_template.format(lang=lang)], {'entities': entities_digest})
+
+def fallback_chains(language_codes: List[str], source_language_code: str, overrides: Dict[str, List[str]] = None) -> Dict[str, List[str]]:
+    """
+    Languages to take a missing translation from, per language code, in order.
+    By default a regional language falls back to its base language and then to
+    the source language, e.g. pt-BR -> pt -> en; overrides replaces the chain of a language.
+    """
+    chains = {}
+    for lang in language_codes:
+        if overrides and lang in overrides:
+            chain = overrides[lang]
+        else:
+            base = lang.replace('_', '-').split('-')[0]
+            chain = [base, source_language_code]
+        chains[lang] = [
+            fallback for position, fallback in enumerate(chain)
+            if fallback != lang and fallback not in chain[:position]
+        ]
+    return chains
+
+def available_fallbacks(fallbacks: Dict[str, List[str]], dist_dir: str) -> Dict[str, List[str]]:
+    """
+    Drop the fallback languages without a `{dist_dir}/{lang}` directory, e.g. pt
+    for pt-BR when the dist only has the regional language.
+    """
+    if not fallbacks:
+        return fallbacks
+    missing = sorted({
+        fallback for chain in fallbacks.values() for fallback in chain
+        if not os.path.isdir(f'{dist_dir}/{fallback}')
+    })
+    if missing:
+        logging.getLogger(__name__).info(f"Fallback languages not in the dist, skipped: {', '.join(missing)}")
+    return {lang: [fallback for fallback in chain if fallback not in missing] for lang, chain in fallbacks.items()}
+
+def resolve_fallbacks(per_language: Dict[str, List[Dict]], language_codes: List[str], fallbacks: Dict[str, List[str]], id_field: str, entity_ids: EntityIndex) -> List[List[Dict]]:
+    """
+    Return the localizations of every language code with missing entities taken
+    from the first language of its fallback chain that has them. Every row gets
+    resolved_from, the language its name came from.
+    """
+    by_language = {lang: {loc[id_field]: loc for loc in localizations} for lang, localizations in per_language.items()}
+    resolved = []
+    for lang in language_codes:
+        chain = [(candidate, by_language[candidate]) for candidate in [lang] + fallbacks.get(lang, [])]
+        localizations = []
+        for entity_id in entity_ids.ids:
+            for candidate, translations in chain:
+                loc = translations.get(entity_id)
+                if loc is not None:
+                    localizations.append({**loc, 'language_code': lang, 'resolved_from': candidate})
+                    break
+        resolved.append(localizations)
+    return resolved
+
+def localize_languages(extract_func, language_codes: List[str], workers: int, *args, cache=None, cache_inputs=None, fallbacks=None, id_field=None, entity_ids=None) -> List[List[Dict]]:
+    """
+    map_languages over language_codes and, with fallbacks, over the languages of
+    their fallback chains, which are then resolved into every language.
+    """
+    if not fallbacks:
+        return map_languages(extract_func, language_codes, workers, *args, cache=cache, cache_inputs=cache_inputs)
+
+    extract_languages = list(language_codes)
+    for lang in language_codes:
+        extract_languages += [fallback for fallback in fallbacks.get(lang, []) if fallback not in extract_languages]
+    per_language = dict(zip(
+        extract_languages,
+        map_languages(extract_func, extract_languages, workers, *args, cache=cache, cache_inputs=cache_inputs)
+    ))
+    return resolve_fallbacks(per_language, language_codes, fallbacks, id_field, entity_ids)
+
+def merge_localizations(per_language: List[List[Dict]], id_field: str = None, ids=None, counts: Counter = None) -> List[Dict]:
+    """
+    Concatenate per-language localizations and number their ids in order, so the
+    result does not depend on how the languages were extracted.
+    With ids (e.g. an IdLedger entry), ids are looked up by '{entity id}:{language code}' instead.
+    With counts, the number of translations of every entity is counted in the same pass.
     """
     all_localizations = []
-    entity_ids = id_loader(version)
     counter = 1
     
-    for lang in language_codes:
-        if entity_type == 'category':
-            localizations = extract_category_localizations(dist_dir, entity_ids, lang)
-        elif entity_type == 'attribute':
-            localizations = extract_attribute_localizations(dist_dir, entity_ids, lang)
-        else:  # attribute_value
-            localizations = extract_value_localizations(dist_dir, entity_ids, lang)
-        
+    for localizations in per_language:
         # Update IDs to continue from last counter
         for loc in localizations:
-            loc['id'] = counter
+            loc['id'] = ids(f"{loc[id_field]}:{loc['language_code']}") if ids else counter
             counter += 1
+            if counts is not None:
+                counts[loc[id_field]] += 1
         
         all_localizations.extend(localizations)
     
+    return all_localizations
+
+def extract_all_localizations(entity_type, dist_dir, entity_ids, language_codes, workers=1, cache=None, ids=None, fallbacks=None):
+    """
+    Extract localizations for all configured languages for a given entity type.
+    With fallbacks (see fallback_chains), missing translations are resolved at build time.
+    """
+    if entity_type == 'category':
+        extract_func, file_name = extract_category_localizations, 'categories.txt'
+    elif entity_type == 'attribute':
+        extract_func, file_name = extract_attribute_localizations, 'attributes.txt'
+    else:  # attribute_value
+        extract_func, file_name = extract_value_localizations, 'attribute_values.txt'
+    
+    # Built once here, worker processes receive it with the pickled index
+    entity_ids.uri_layout()
+    translation_counts = Counter()
+    all_localizations = merge_localizations(
+        localize_languages(
+            extract_func, language_codes, workers, dist_dir, entity_ids,
+            cache=cache,
+            cache_inputs=_entity_cache_inputs(f'{dist_dir}/{{lang}}/{file_name}', entity_ids) if cache else None,
+            fallbacks=fallbacks,
+            id_field=_id_field(entity_type),
+            entity_ids=entity_ids
+        ),
+        _id_field(entity_type),
+        ids,
+        translation_counts
+    )
+    
     # Validate translations
-    validate_translations(entity_type, all_localizations, entity_ids, language_codes)
+    validate_translations(entity_type, all_localizations, entity_ids, language_codes, translation_counts)
     
     return all_localizations
 
-def extract_vertical_localizations(dist_dir: str, verticals: Dict, lang_code: str):
+def extract_vertical_localizations(taxonomy: Taxonomy, verticals: EntityIndex, lang_code: str):
     """
     Extract vertical localizations from taxonomy.json
     """
     logger = logging.getLogger(__name__)
     
     try:
-        with open(f'{dist_dir}/{lang_code}/taxonomy.json', 'r', encoding='utf-8') as f:
-            taxonomy_data = json.load(f)
-            translations = {v['prefix']: v['name'] for v in taxonomy_data.get('verticals', [])}
+        taxonomy_data = taxonomy.taxonomy(lang_code)
+        translations = {v['prefix']: v['name'] for v in taxonomy_data.get('verticals', [])}
     except FileNotFoundError:
         logger.error(f"Taxonomy file not found for language {lang_code}")
         return []
     
     localizations = []
     
-    for vertical_id, info in verticals.items():
-        if info['prefix'] in translations:
+    for vertical_id, prefix in verticals.handles.items():
+        if prefix in translations:
             localizations.append({
                 'id': None,
                 'vertical_id': vertical_id,
                 'language_code': lang_code,
-                'name': translations[info['prefix']]
+                'name': translations[prefix]
             })
     
     return localizations
 
-def load_vertical_ids(version):
-    vertical_ids = {}
-    with open(f'data/output/{version}/verticals.csv', 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            vertical_ids[row['id']] = {
-                'prefix': row['prefix'],
-                'name': row['name']
-            }
-    return vertical_ids
-
-def extract_all_vertical_localizations(dist_dir: str, language_codes: List[str], version: str):
+def extract_all_vertical_localizations(taxonomy: Taxonomy, vertical_ids: EntityIndex, language_codes: List[str], workers: int = 1, cache=None, ids=None, fallbacks=None):
     """
     Extract vertical localizations for all configured languages
     """
-    all_localizations = []
-    vertical_ids = load_vertical_ids(version)
-    counter = 1
-    
-    for lang in language_codes:
-        localizations = extract_vertical_localizations(dist_dir, vertical_ids, lang)
-        
-        # Update IDs to continue from last counter
-        for loc in localizations:
-            loc['id'] = counter
-            counter += 1
-        
-        all_localizations.extend(localizations)
+    translation_counts = Counter()
+    all_localizations = merge_localizations(
+        localize_languages(
+            extract_vertical_localizations, language_codes, workers, taxonomy, vertical_ids,
+            cache=cache,
+            cache_inputs=_entity_cache_inputs(f'{taxonomy.dist_dir}/{{lang}}/taxonomy.json', vertical_ids) if cache else None,
+            fallbacks=fallbacks,
+            id_field='vertical_id',
+            entity_ids=vertical_ids
+        ),
+        'vertical_id',
+        ids,
+        translation_counts
+    )
     
     # Validate translations
-    validate_translations('vertical', all_localizations, 
-                        {k: {'id': k} for k in vertical_ids.keys()}, 
-                        language_codes)
+    validate_translations('vertical', all_localizations, vertical_ids, language_codes, translation_counts)
     
     return all_localizations
 
-def extract_all_extended_attribute_localizations(dist_dir: str, language_codes: List[str], version: str):
+def extract_all_extended_attribute_localizations(taxonomy: Taxonomy, extended_attribute_ids: EntityIndex, language_codes: List[str], workers: int = 1, cache=None, ids=None, fallbacks=None):
     """Extract extended attribute localizations for all configured languages"""
-    all_localizations = []
-    extended_attribute_ids = load_extended_attribute_ids(version)
-    counter = 1
-    
-    for lang in language_codes:
-        localizations = extract_extended_attribute_localizations(dist_dir, extended_attribute_ids, lang)
-        
-        # Update IDs to continue from last counter
-        for loc in localizations:
-            loc['id'] = counter
-            counter += 1
-        
-        all_localizations.extend(localizations)
+    translation_counts = Counter()
+    all_localizations = merge_localizations(
+        localize_languages(
+            extract_extended_attribute_localizations, language_codes, workers, taxonomy, extended_attribute_ids,
+            cache=cache,
+            cache_inputs=_entity_cache_inputs(f'{taxonomy.dist_dir}/{{lang}}/attributes.json', extended_attribute_ids) if cache else None,
+            fallbacks=fallbacks,
+            id_field='extended_attribute_id',
+            entity_ids=extended_attribute_ids
+        ),
+        'extended_attribute_id',
+        ids,
+        translation_counts
+    )
     
     # Validate translations
-    validate_translations('extended_attribute', all_localizations, 
-                        {k: {'id': k} for k in extended_attribute_ids.keys()}, 
-                        language_codes)
+    validate_translations('extended_attribute', all_localizations, extended_attribute_ids, language_codes, translation_counts)
     
     return all_localizations
 
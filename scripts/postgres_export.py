@@ -0,0 +1,123 @@
+import logging
+import os
+import struct
+import threading
+from scripts.schema import TABLES, is_integer_column, to_integer
+
+# Header of the binary COPY format: signature, flags, header extension length
+BINARY_HEADER = b'PGCOPY\n\xff\r\n\x00' + struct.pack('>ii', 0, 0)
+BINARY_TRAILER = struct.pack('>h', -1)
+BINARY_NULL = struct.pack('>i', -1)
+
+TEXT_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+TEXT_NULL = '\\N'
+
+def encode_text_row(values):
+    """Encode one row in the COPY text format (tab separated, \\N for NULL)."""
+    return '\t'.join(
+        TEXT_NULL if value is None else str(value).translate(TEXT_ESCAPES)
+        for value in values
+    ) + '\n'
+
+def encode_binary_row(values, integer_columns):
+    """Encode one row in the COPY binary format (int4 for integers, UTF-8 text otherwise)."""
+    parts = [struct.pack('>h', len(values))]
+    for value, integer in zip(values, integer_columns):
+        if value is None:
+            parts.append(BINARY_NULL)
+        elif integer:
+            parts.append(struct.pack('>ii', 4, value))
+        else:
+            encoded = str(value).encode('utf-8')
+            parts.append(struct.pack('>i', len(encoded)))
+            parts.append(encoded)
+    return b''.join(parts)
+
+class PostgresTable:
+    def __init__(self, path, fieldnames, binary):
+        self.fieldnames = list(fieldnames)
+        self.integer_columns = [is_integer_column(column) for column in self.fieldnames]
+        self.binary = binary
+        if binary:
+            self.file = open(path, 'wb')
+            self.file.write(BINARY_HEADER)
+        else:
+            self.file = open(path, 'w', encoding='utf-8', newline='')
+
+    def write(self, rows):
+        values = [
+            [
+                to_integer(row.get(column)) if integer else row.get(column)
+                for column, integer in zip(self.fieldnames, self.integer_columns)
+            ]
+            for row in rows
+        ]
+        if self.binary:
+            self.file.write(b''.join(encode_binary_row(row, self.integer_columns) for row in values))
+        else:
+            self.file.write(''.join(encode_text_row(row) for row in values))
+
+    def close(self):
+        if self.binary:
+            self.file.write(BINARY_TRAILER)
+        self.file.close()
+
+class PostgresSink:
+    """
+    Writes every table as a COPY file plus a psql script that creates the
+    tables, bulk loads them with \\copy and builds keys and indexes afterwards,
+    all in one transaction.
+    """
+
+    def __init__(self, output_dir, copy_format='text'):
+        if copy_format not in ('text', 'binary'):
+            raise ValueError(f"Unknown COPY format: {copy_format}")
+        self.output_dir = output_dir
+        self.copy_format = copy_format
+        self.tables = {}
+        self._lock = threading.Lock()
+        os.makedirs(output_dir, exist_ok=True)
+
+    def table(self, name, fieldnames):
+        file_name = f'{name}.{"bin" if self.copy_format == "binary" else "copy"}'
+        with self._lock:
+            self.tables[name] = (file_name, list(fieldnames))
+        return PostgresTable(os.path.join(self.output_dir, file_name), fieldnames, self.copy_format == 'binary')
+
+    def load_script(self):
+        lines = [
+            '-- Load with: cd <this directory> && psql -v ON_ERROR_STOP=1 -f load.sql',
+            'BEGIN;',
+            '',
+        ]
+        for name, (file_name, fieldnames) in sorted(self.tables.items()):
+            columns = ',\n'.join(
+                f'    {column} {"integer" if is_integer_column(column) else "text"}'
+                for column in fieldnames
+            )
+            lines.append(f'DROP TABLE IF EXISTS {name};')
+            lines.append(f'CREATE TABLE {name} (\n{columns}\n);')
+            lines.append(f"\\copy {name} ({', '.join(fieldnames)}) FROM '{file_name}' WITH (FORMAT {self.copy_format})")
+            lines.append('')
+
+        # Keys and indexes are built once the data is in place
+        for name, (_, fieldnames) in sorted(self.tables.items()):
+            primary_key = TABLES.get(name, {}).get('primary_key')
+            if primary_key:
+                lines.append(f'ALTER TABLE {name} ADD PRIMARY KEY ({", ".join(primary_key)});')
+            for columns in TABLES.get(name, {}).get('indexes', []):
+                if all(column in fieldnames for column in columns):
+                    lines.append(f'CREATE INDEX idx_{name}_{"_".join(columns)} ON {name} ({", ".join(columns)});')
+
+        lines += ['', 'COMMIT;', '', f'ANALYZE {", ".join(sorted(self.tables))};' if self.tables else '', '']
+        return '\n'.join(lines)
+
+    def close(self):
+        with open(os.path.join(self.output_dir, 'load.sql'), 'w', encoding='utf-8') as f:
+            f.write(self.load_script())
+        logging.getLogger(__name__).info(
+            f"PostgreSQL COPY files written: {self.output_dir} ({len(self.tables)} tables, {self.copy_format})"
+        )
+
+    def abort(self):
+        pass
@@ -0,0 +1,99 @@
+import hashlib
+
+class EntityIndex:
+    """
+    Serial id lookups for one entity type.
+
+    Filled from the rows produced by the extract functions so later steps can
+    resolve shopify ids, handles and URIs without reading the CSVs back.
+    Serial ids are kept as integers.
+    """
+
+    def __init__(self, handle_field='handle'):
+        self.handle_field = handle_field
+        self.ids = []
+        self.handles = {}
+        self.uris = {}
+        self.by_shopify_id = {}
+        self.by_handle = {}
+        self.by_uri = {}
+        # Source language names, for the wide localization tables
+        self.names = {}
+        # Parent serial ids, for entities with a parent_id (categories)
+        self.parents = {}
+        # URI positions in uris, built on first use and shared by every language
+        self._uri_positions = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, serial_id):
+        return serial_id in self.handles
+
+    def add(self, row):
+        serial_id = row['id']
+        self.ids.append(serial_id)
+
+        handle = row.get(self.handle_field)
+        self.handles[serial_id] = handle
+        if handle is not None:
+            self.by_handle[handle] = serial_id
+
+        shopify_id = row.get('shopify_id')
+        if shopify_id is not None:
+            self.by_shopify_id[shopify_id] = serial_id
+
+        uri = row.get('shopify_uri')
+        if uri is not None:
+            self.uris[serial_id] = uri
+            self.by_uri[uri] = serial_id
+
+        self.names[serial_id] = row.get('name')
+
+        if 'parent_id' in row:
+            self.parents[serial_id] = row['parent_id']
+
+    def uri_layout(self):
+        """
+        Return (positions, duplicates) for keeping per-language data in dense
+        lists of len(uris), in registration order: positions maps every URI to
+        the position of its first entity, duplicates lists (position, first
+        position) for later entities sharing a URI.
+        """
+        if self._uri_positions is None or self._uri_positions[2] != len(self.uris):
+            positions = {}
+            duplicates = []
+            for position, uri in enumerate(self.uris.values()):
+                first = positions.setdefault(uri, position)
+                if first != position:
+                    duplicates.append((position, first))
+            self._uri_positions = (positions, duplicates, len(self.uris))
+        return self._uri_positions[:2]
+
+    def register(self, rows):
+        for row in rows:
+            self.add(row)
+
+    def track(self, rows):
+        """Register rows while passing them through, for streamed extraction."""
+        for row in rows:
+            self.add(row)
+            yield row
+
+    def digest(self):
+        """Fingerprint of the registered ids, used as cache input by steps reading this index."""
+        digest = hashlib.sha256()
+        for serial_id in self.ids:
+            digest.update(repr((serial_id, self.handles[serial_id], self.uris.get(serial_id))).encode('utf-8'))
+        return digest.hexdigest()
+
+class IdRegistry:
+    """Serial id indexes for every entity type of one taxonomy version."""
+
+    def __init__(self):
+        self.verticals = EntityIndex(handle_field='prefix')
+        # Categories have no handle, the shopify id (e.g. 'aa-1-2') is used instead
+        self.categories = EntityIndex(handle_field='shopify_id')
+        self.attributes = EntityIndex()
+        self.extended_attributes = EntityIndex()
+        self.attribute_values = EntityIndex()
@@ -0,0 +1,174 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+class Step:
+    """
+    A pipeline step with the artifacts it reads (inputs) and produces (outputs).
+
+    A step can start once every step producing one of its inputs has finished.
+    """
+
+    def __init__(self, name, run, inputs=(), outputs=()):
+        self.name = name
+        self.run = run
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+
+def resolve_dependencies(steps):
+    """Map each step name to the names of the steps producing its inputs."""
+    producers = {}
+    for step in steps:
+        for output in step.outputs:
+            if output in producers:
+                raise ValueError(f"Artifact '{output}' is produced by both '{producers[output]}' and '{step.name}'")
+            producers[output] = step.name
+
+    dependencies = {}
+    for step in steps:
+        missing = [i for i in step.inputs if i not in producers]
+        if missing:
+            raise ValueError(f"Step '{step.name}' needs artifacts nobody produces: {', '.join(missing)}")
+        dependencies[step.name] = {producers[i] for i in step.inputs}
+
+    # Reject cycles before anything runs
+    done = set()
+    remaining = dict(dependencies)
+    while remaining:
+        ready = [name for name, deps in remaining.items() if deps <= done]
+        if not ready:
+            raise ValueError(f"Dependency cycle between steps: {', '.join(remaining)}")
+        for name in ready:
+            done.add(name)
+            del remaining[name]
+
+    return dependencies
+
+def step_key(name):
+    """Step names compared case-insensitively, with '-' and '_' read as spaces."""
+    return ' '.join(name.lower().replace('-', ' ').replace('_', ' ').split())
+
+def check_step_names(steps, names):
+    """Raise ValueError listing the declared steps if one of names is not a step."""
+    known = {step_key(step.name) for step in steps}
+    unknown = [name for name in names if step_key(name) not in known]
+    if unknown:
+        raise ValueError(f"Unknown steps: {', '.join(unknown)}. Steps: {', '.join(step.name for step in steps)}")
+
+def select_steps(steps, only=None, skip=None):
+    """
+    Return the steps to run, in the order given.
+
+    With only, the named steps run together with every step they depend on,
+    since later steps read the state earlier ones build. With skip, the named
+    steps are left out together with every step depending on them.
+    """
+    logger = logging.getLogger(__name__)
+    check_step_names(steps, list(only or []) + list(skip or []))
+    names = {step_key(step.name): step.name for step in steps}
+    dependencies = resolve_dependencies(steps)
+
+    selected = [step.name for step in steps]
+    if only:
+        requested = {names[step_key(name)] for name in only}
+        needed = set()
+        stack = list(requested)
+        while stack:
+            name = stack.pop()
+            if name not in needed:
+                needed.add(name)
+                stack.extend(dependencies[name])
+        if needed - requested:
+            logger.info(f"Also running {', '.join(name for name in selected if name in needed - requested)}, needed by --only")
+        selected = [name for name in selected if name in needed]
+    if skip:
+        skipped = {names[step_key(name)] for name in skip}
+        dependents = [name for name in selected if name not in skipped and dependencies[name] & skipped]
+        while dependents:
+            for name in dependents:
+                logger.warning(f"Skipping {name}, it depends on a skipped step")
+            skipped.update(dependents)
+            dependents = [name for name in selected if name not in skipped and dependencies[name] & skipped]
+        selected = [name for name in selected if name not in skipped]
+
+    return [step for step in steps if step.name in selected]
+
+def critical_path(steps, dependencies, durations):
+    """Return the chain of steps with the longest total duration and that duration."""
+    longest = {}
+    previous = {}
+    # Steps are visited in dependency order, so all predecessors are resolved first
+    pending = [step.name for step in steps]
+    while pending:
+        for name in list(pending):
+            deps = dependencies[name]
+            if all(dep in longest for dep in deps):
+                best = max(deps, key=lambda dep: longest[dep], default=None)
+                longest[name] = durations.get(name, 0.0) + (longest[best] if best else 0.0)
+                previous[name] = best
+                pending.remove(name)
+
+    if not longest:
+        return [], 0.0
+
+    name = max(longest, key=longest.get)
+    total = longest[name]
+    path = []
+    while name:
+        path.append(name)
+        name = previous[name]
+    return path[::-1], total
+
+def run_steps(steps, workers=1):
+    """
+    Run steps on a thread pool as soon as their inputs are available.
+
+    Steps share in-memory state (taxonomy, id registry), so threads are used;
+    they hold the GIL while parsing, so concurrent steps overlap I/O and waits
+    on worker processes, not CPU work. With one worker the steps run one at a time in the order given. Returns the
+    value returned by each step, keyed by step name.
+    """
+    logger = logging.getLogger(__name__)
+    dependencies = resolve_dependencies(steps)
+
+    results = {}
+    durations = {}
+    finished = set()
+    pending = list(steps)
+    running = {}
+    started = time.perf_counter()
+
+    def timed(step):
+        step_started = time.perf_counter()
+        try:
+            return step.run()
+        finally:
+            durations[step.name] = time.perf_counter() - step_started
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        while pending or running:
+            for step in [s for s in pending if dependencies[s.name] <= finished]:
+                pending.remove(step)
+                logger.info(f"Starting {step.name}")
+                running[executor.submit(timed, step)] = step
+
+            completed, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in completed:
+                step = running.pop(future)
+                try:
+                    results[step.name] = future.result()
+                except Exception:
+                    for other in running:
+                        other.cancel()
+                    raise
+                finished.add(step.name)
+                logger.info(f"{step.name}: OK ({durations[step.name]:.2f}s)")
+
+    elapsed = time.perf_counter() - started
+    path, path_duration = critical_path(steps, dependencies, durations)
+    logger.info(
+        f"Critical path: {' -> '.join(path)} ({path_duration:.2f}s); "
+        f"sum of steps {sum(durations.values()):.2f}s, wall time {elapsed:.2f}s"
+    )
+
+    return results
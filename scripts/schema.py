@@ -0,0 +1,120 @@
+# Primary keys and secondary indexes of the output tables, used by the database
+# exporters. Tables not listed here are still loaded, with column types taken
+# from the naming convention below.
+#
+# natural_key identifies a row across taxonomy versions, where serial ids can
+# differ. Columns listed in references hold serial ids of another table and are
+# compared by that table's natural key.
+TABLES = {
+    'verticals': {
+        'primary_key': ['id'],
+        'indexes': [['prefix']],
+        'natural_key': ['prefix'],
+    },
+    'categories': {
+        'primary_key': ['id'],
+        'indexes': [['shopify_id'], ['parent_id'], ['vertical_id']],
+        'natural_key': ['shopify_id'],
+        'references': {'parent_id': 'categories', 'vertical_id': 'verticals'},
+    },
+    'category_nested_set': {
+        'primary_key': ['category_id'],
+        'indexes': [['lft']],
+        'natural_key': ['category_id'],
+        'references': {'category_id': 'categories'},
+    },
+    'category_closure': {
+        'primary_key': ['ancestor_id', 'descendant_id'],
+        'indexes': [['descendant_id']],
+        'natural_key': ['ancestor_id', 'descendant_id'],
+        'references': {'ancestor_id': 'categories', 'descendant_id': 'categories'},
+    },
+    'attributes': {
+        'primary_key': ['id'],
+        'indexes': [['shopify_id'], ['handle']],
+        'natural_key': ['shopify_id'],
+    },
+    'extended_attributes': {
+        'primary_key': ['id'],
+        'indexes': [['handle']],
+        'natural_key': ['handle'],
+    },
+    'attribute_values': {
+        'primary_key': ['id'],
+        'indexes': [['shopify_id'], ['handle']],
+        'natural_key': ['shopify_id'],
+    },
+    'attribute_value_mappings': {
+        'primary_key': ['attribute_id', 'value_id'],
+        'indexes': [['value_id']],
+        'natural_key': ['attribute_id', 'value_id'],
+        'references': {'attribute_id': 'attributes', 'value_id': 'attribute_values'},
+    },
+    'category_attribute_mappings': {
+        'indexes': [['category_id'], ['attribute_id'], ['extended_attribute_id']],
+        'natural_key': ['category_id', 'attribute_id', 'extended_attribute_id'],
+        'references': {
+            'category_id': 'categories',
+            'attribute_id': 'attributes',
+            'extended_attribute_id': 'extended_attributes',
+        },
+    },
+    'category_effective_attributes': {
+        'indexes': [['category_id'], ['attribute_id']],
+        'natural_key': ['category_id', 'attribute_id', 'extended_attribute_id'],
+        'references': {
+            'category_id': 'categories',
+            'attribute_id': 'attributes',
+            'extended_attribute_id': 'extended_attributes',
+            'source_category_id': 'categories',
+        },
+    },
+    'attribute_extended_mappings': {
+        'primary_key': ['attribute_id', 'extended_attribute_id'],
+        'indexes': [['extended_attribute_id']],
+        'natural_key': ['attribute_id', 'extended_attribute_id'],
+        'references': {'attribute_id': 'attributes', 'extended_attribute_id': 'extended_attributes'},
+    },
+    'localizations_category': {
+        'primary_key': ['id'],
+        'indexes': [['category_id', 'language_code']],
+        'natural_key': ['category_id', 'language_code'],
+        'references': {'category_id': 'categories'},
+    },
+    'localizations_attribute': {
+        'primary_key': ['id'],
+        'indexes': [['attribute_id', 'language_code']],
+        'natural_key': ['attribute_id', 'language_code'],
+        'references': {'attribute_id': 'attributes'},
+    },
+    'localizations_attribute_value': {
+        'primary_key': ['id'],
+        'indexes': [['attribute_value_id', 'language_code']],
+        'natural_key': ['attribute_value_id', 'language_code'],
+        'references': {'attribute_value_id': 'attribute_values'},
+    },
+    'localizations_vertical': {
+        'primary_key': ['id'],
+        'indexes': [['vertical_id', 'language_code']],
+        'natural_key': ['vertical_id', 'language_code'],
+        'references': {'vertical_id': 'verticals'},
+    },
+    'localizations_extended_attribute': {
+        'primary_key': ['id'],
+        'indexes': [['extended_attribute_id', 'language_code']],
+        'natural_key': ['extended_attribute_id', 'language_code'],
+        'references': {'extended_attribute_id': 'extended_attributes'},
+    },
+}
+
+# Columns that hold integers besides serial ids and foreign keys (`id`, `*_id`)
+INTEGER_COLUMNS = {'level', 'lft', 'rgt', 'depth'}
+
+def is_integer_column(column):
+    return column == 'id' or (column.endswith('_id') and column != 'shopify_id') or column in INTEGER_COLUMNS
+
+def to_integer(value):
+    # Missing foreign keys arrive as None, '' or the legacy 'NULL' marker
+    if value is None or value == '' or value == 'NULL':
+        return None
+    return int(value)
@@ -0,0 +1,209 @@
+import argparse
+import heapq
+import logging
+import os
+import pickle
+import time
+import unicodedata
+from array import array
+from collections import Counter
+from operator import itemgetter
+
+# Entity types whose names are indexed: entity type -> (registry index, id column of its localization rows)
+ENTITY_TABLES = {
+    'vertical': ('verticals', 'vertical_id'),
+    'category': ('categories', 'category_id'),
+    'attribute': ('attributes', 'attribute_id'),
+    'extended_attribute': ('extended_attributes', 'extended_attribute_id'),
+    'attribute_value': ('attribute_values', 'attribute_value_id'),
+}
+ENTITY_TYPES = list(ENTITY_TABLES)
+
+# Posting entries counted per query before the most common trigrams are skipped
+MAX_POSTINGS = 100000
+# Candidates rescored exactly when common trigrams were skipped, per requested result
+CANDIDATES_PER_RESULT = 50
+
+def normalize(text):
+    return ' '.join(unicodedata.normalize('NFKC', text or '').casefold().split())
+
+def trigrams(text):
+    """Distinct trigrams of the normalized text, padded so word starts and ends count."""
+    padded = f'  {normalize(text)} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class SearchIndex:
+    """
+    Trigram inverted index over the names of every entity in every language.
+
+    Documents are stored in parallel arrays and every trigram maps to the array
+    of documents containing it. A query counts the shared trigrams of each
+    candidate document in C (Counter.update over the posting arrays), rarest
+    trigrams first, and ranks by Jaccard similarity, keeping the best document
+    per entity. Once MAX_POSTINGS entries are counted, the remaining common
+    trigrams are skipped and the best candidates are rescored from their names,
+    so query time stays bounded on large indexes.
+    """
+
+    def __init__(self):
+        self.languages = []
+        self.types = array('B')
+        self.ids = array('I')
+        self.language_indexes = array('H')
+        self.sizes = array('H')
+        self.names = []
+        self.postings = {}
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, entity_type, entity_id, language_code, name):
+        grams = trigrams(name)
+        if not grams:
+            return
+        if language_code not in self.languages:
+            self.languages.append(language_code)
+        document = len(self.names)
+        self.types.append(ENTITY_TYPES.index(entity_type))
+        self.ids.append(int(entity_id))
+        self.language_indexes.append(self.languages.index(language_code))
+        self.sizes.append(min(len(grams), 0xFFFF))
+        self.names.append(name)
+        for gram in grams:
+            posting = self.postings.get(gram)
+            if posting is None:
+                posting = self.postings[gram] = array('I')
+            posting.append(document)
+
+    def search(self, query, k=10, entity_types=None, language_codes=None):
+        """
+        Return up to k dicts (entity_type, entity_id, language_code, name, score)
+        for the entities whose name in any language is most similar to query.
+        """
+        grams = trigrams(query)
+        counts = Counter()
+        counted = 0
+        skipped = False
+        for posting in sorted((self.postings[gram] for gram in grams if gram in self.postings), key=len):
+            if counted and counted + len(posting) > MAX_POSTINGS:
+                skipped = True
+                break
+            counts.update(posting)
+            counted += len(posting)
+
+        allowed_types = {ENTITY_TYPES.index(entity_type) for entity_type in entity_types} if entity_types else None
+        allowed_languages = {
+            self.languages.index(language_code) for language_code in language_codes if language_code in self.languages
+        } if language_codes else None
+
+        def allowed(document):
+            return (
+                (allowed_types is None or self.types[document] in allowed_types)
+                and (allowed_languages is None or self.language_indexes[document] in allowed_languages)
+            )
+
+        if skipped:
+            # Partial counts are lower bounds, the best candidates get their exact count
+            candidates = [
+                (document, len(grams & trigrams(self.names[document])))
+                for document, _ in heapq.nlargest(
+                    k * CANDIDATES_PER_RESULT,
+                    (item for item in counts.items() if allowed(item[0])),
+                    key=itemgetter(1)
+                )
+            ]
+        else:
+            candidates = (item for item in counts.items() if allowed(item[0]))
+
+        # Best document per entity
+        best = {}
+        for document, shared in candidates:
+            score = shared / (len(grams) + self.sizes[document] - shared)
+            key = (self.types[document], self.ids[document])
+            if key not in best or score > best[key][0]:
+                best[key] = (score, document)
+
+        top = heapq.nlargest(k, best.values(), key=lambda item: (item[0], -len(self.names[item[1]]), -item[1]))
+        return [
+            {
+                'entity_type': ENTITY_TYPES[self.types[document]],
+                'entity_id': self.ids[document],
+                'language_code': self.languages[self.language_indexes[document]],
+                'name': self.names[document],
+                'score': round(score, 4),
+            }
+            for score, document in top
+        ]
+
+    def save(self, path):
+        """Write the index as one pickle of flat arrays, written atomically."""
+        state = {
+            'languages': self.languages,
+            'types': self.types.tobytes(),
+            'ids': self.ids.tobytes(),
+            'language_indexes': self.language_indexes.tobytes(),
+            'sizes': self.sizes.tobytes(),
+            'names': self.names,
+            'postings': {gram: self.postings[gram].tobytes() for gram in sorted(self.postings)},
+        }
+        temp_path = f'{path}.tmp'
+        with open(temp_path, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            state = pickle.load(f)
+        index = cls()
+        index.languages = state['languages']
+        index.types.frombytes(state['types'])
+        index.ids.frombytes(state['ids'])
+        index.language_indexes.frombytes(state['language_indexes'])
+        index.sizes.frombytes(state['sizes'])
+        index.names = state['names']
+        for gram, data in state['postings'].items():
+            posting = array('I')
+            posting.frombytes(data)
+            index.postings[gram] = posting
+        return index
+
+def build_search_index(registry, localizations, source_language_code):
+    """
+    Index the source names registered in registry and the localization rows
+    of every entity type (entity type -> rows), as they were written.
+    """
+    index = SearchIndex()
+    for entity_type, (entity_index, _) in ENTITY_TABLES.items():
+        entity_ids = getattr(registry, entity_index)
+        for entity_id in entity_ids.ids:
+            index.add(entity_type, entity_id, source_language_code, entity_ids.names[entity_id] or '')
+    for entity_type, (_, id_column) in ENTITY_TABLES.items():
+        for row in localizations.get(entity_type, ()):
+            index.add(entity_type, row[id_column], row['language_code'], row['name'] or '')
+    logging.getLogger(__name__).info(
+        f"Search index: {len(index)} names in {len(index.languages)} languages, {len(index.postings)} trigrams"
+    )
+    return index
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Search the names of all entities in the search index of a version')
+    parser.add_argument('query', help='Text to search for, in any configured language')
+    parser.add_argument('--version', default='2025-06-unstable', help='Taxonomy version whose output in --output-dir is searched (default: 2025-06-unstable)')
+    parser.add_argument('--output-dir', default='data/output', metavar='DIR', help='Directory main.py wrote the output to, as DIR/VERSION (default: data/output)')
+    parser.add_argument('-k', type=int, default=10, help='Number of results (default: 10)')
+    parser.add_argument('--type', dest='entity_types', nargs='+', choices=ENTITY_TYPES, help='Only return these entity types')
+    parser.add_argument('--language', dest='language_codes', nargs='+', help='Only match names in these languages')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    index = SearchIndex.load(f'{args.output_dir}/{args.version}/search_index.pickle')
+    started = time.perf_counter()
+    results = index.search(args.query, args.k, args.entity_types, args.language_codes)
+    elapsed = time.perf_counter() - started
+    for result in results:
+        print(f"{result['score']:.3f}  {result['entity_type']:<18} {result['entity_id']:>8}  {result['language_code']:<6} {result['name']}")
+    logging.getLogger(__name__).info(f"{len(results)} results in {elapsed * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import csv
+import hashlib
+import json
+import logging
+import os
+import threading
+
+# Sharded tables -> column holding the category, or None when the row has vertical_id itself
+SHARDED_TABLES = {
+    'categories': None,
+    'category_attribute_mappings': 'category_id',
+    'localizations_category': 'category_id',
+}
+
+def file_checksum(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class IgnoredTable:
+    def write(self, rows):
+        pass
+
+    def close(self):
+        pass
+
+class ShardedTable:
+    def __init__(self, sink, name, fieldnames, category_column):
+        self.sink = sink
+        self.name = name
+        self.fieldnames = list(fieldnames)
+        self.category_column = category_column
+        self.directory = os.path.join(sink.output_dir, name)
+        os.makedirs(self.directory, exist_ok=True)
+        # Shards of verticals that no longer exist would be left over from a previous run
+        for file_name in os.listdir(self.directory):
+            if file_name.startswith('vertical_') and file_name.endswith('.csv'):
+                os.remove(os.path.join(self.directory, file_name))
+        # vertical_id -> (file, writer, row count)
+        self.shards = {}
+
+    def vertical_id(self, row):
+        if self.category_column is None:
+            self.sink.category_verticals[row['id']] = row['vertical_id']
+            return row['vertical_id']
+        return self.sink.category_verticals.get(row[self.category_column])
+
+    def write(self, rows):
+        for row in rows:
+            vertical_id = self.vertical_id(row)
+            shard = self.shards.get(vertical_id)
+            if shard is None:
+                file_name = f'vertical_{"none" if vertical_id in (None, "") else vertical_id}.csv'
+                f = open(os.path.join(self.directory, file_name), 'w', newline='', encoding='utf-8')
+                writer = csv.DictWriter(f, fieldnames=self.fieldnames)
+                writer.writeheader()
+                shard = self.shards[vertical_id] = [f, writer, 0]
+            shard[1].writerow(row)
+            shard[2] += 1
+
+    def close(self):
+        entries = []
+        for vertical_id, (f, _, row_count) in self.shards.items():
+            f.close()
+            entries.append({
+                'vertical_id': None if vertical_id in (None, '') else int(vertical_id),
+                'file': os.path.relpath(f.name, self.sink.output_dir),
+                'rows': row_count,
+                'sha256': file_checksum(f.name),
+            })
+        entries.sort(key=lambda entry: (entry['vertical_id'] is None, entry['vertical_id'] or 0))
+        self.sink.add_table(self.name, self.fieldnames, entries)
+
+class VerticalShardSink:
+    """
+    Writes categories, category-attribute mappings and category localizations
+    as one CSV per vertical, so loaders can ingest the shards concurrently.
+
+    The vertical of each category is taken from the categories rows as they are
+    written, so the other two tables must be written after categories (the
+    step dependencies guarantee this). manifest.json lists every shard with its
+    row count and SHA-256 checksum.
+    """
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.category_verticals = {}
+        self.tables = {}
+        self._lock = threading.Lock()
+        os.makedirs(output_dir, exist_ok=True)
+
+    def table(self, name, fieldnames):
+        if name not in SHARDED_TABLES:
+            return IgnoredTable()
+        return ShardedTable(self, name, fieldnames, SHARDED_TABLES[name])
+
+    def add_table(self, name, fieldnames, shards):
+        with self._lock:
+            self.tables[name] = {
+                'fieldnames': fieldnames,
+                'rows': sum(shard['rows'] for shard in shards),
+                'shards': shards,
+            }
+
+    def manifest(self):
+        return {'shard_key': 'vertical_id', 'tables': dict(sorted(self.tables.items()))}
+
+    def close(self):
+        with open(os.path.join(self.output_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+            json.dump(self.manifest(), f, indent=2)
+        logging.getLogger(__name__).info(
+            f"Vertical shards written: {self.output_dir} "
+            f"({sum(len(table['shards']) for table in self.tables.values())} shards of {len(self.tables)} tables)"
+        )
+
+    def abort(self):
+        pass
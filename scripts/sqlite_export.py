@@ -0,0 +1,102 @@
+import logging
+import os
+import sqlite3
+import threading
+from scripts.schema import TABLES, is_integer_column, to_integer
+
+# Bulk load settings: the database is rebuilt from scratch, so durability
+# during the load is traded for speed
+PRAGMAS = [
+    'PRAGMA journal_mode = MEMORY',
+    'PRAGMA synchronous = OFF',
+    'PRAGMA temp_store = MEMORY',
+    'PRAGMA cache_size = -262144',
+    'PRAGMA locking_mode = EXCLUSIVE',
+]
+
+class SqliteTable:
+    def __init__(self, sink, name, fieldnames):
+        self.sink = sink
+        self.fieldnames = list(fieldnames)
+        self.integer_columns = [is_integer_column(column) for column in self.fieldnames]
+        self.insert_sql = (
+            f'INSERT INTO "{name}" ({", ".join(self.fieldnames)}) '
+            f'VALUES ({", ".join("?" for _ in self.fieldnames)})'
+        )
+
+    def write(self, rows):
+        values = [
+            tuple(
+                to_integer(row.get(column)) if integer else row.get(column)
+                for column, integer in zip(self.fieldnames, self.integer_columns)
+            )
+            for row in rows
+        ]
+        self.sink.executemany(self.insert_sql, values)
+
+    def close(self):
+        pass
+
+class SqliteSink:
+    """
+    Loads every table written by the pipeline into one SQLite database.
+
+    All rows are inserted with executemany in a single transaction; secondary
+    indexes are created after the load and committed with it.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.tables = {}
+        self.closed = False
+        self._lock = threading.Lock()
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        # Steps write concurrently, the lock serializes access to the connection
+        self.connection = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+        for pragma in PRAGMAS:
+            self.connection.execute(pragma)
+        self.connection.execute('BEGIN')
+
+    def table(self, name, fieldnames):
+        columns = []
+        for column in fieldnames:
+            columns.append(f'{column} {"INTEGER" if is_integer_column(column) else "TEXT"}')
+        primary_key = TABLES.get(name, {}).get('primary_key')
+        if primary_key:
+            columns.append(f'PRIMARY KEY ({", ".join(primary_key)})')
+
+        with self._lock:
+            self.connection.execute(f'DROP TABLE IF EXISTS "{name}"')
+            self.connection.execute(f'CREATE TABLE "{name}" ({", ".join(columns)})')
+            self.tables[name] = list(fieldnames)
+        return SqliteTable(self, name, fieldnames)
+
+    def executemany(self, sql, values):
+        with self._lock:
+            self.connection.executemany(sql, values)
+
+    def close(self):
+        """Create the secondary indexes and commit the load."""
+        logger = logging.getLogger(__name__)
+        with self._lock:
+            for name, fieldnames in self.tables.items():
+                for columns in TABLES.get(name, {}).get('indexes', []):
+                    if all(column in fieldnames for column in columns):
+                        self.connection.execute(
+                            f'CREATE INDEX "idx_{name}_{"_".join(columns)}" ON "{name}" ({", ".join(columns)})'
+                        )
+            self.connection.execute('COMMIT')
+            self.connection.execute('PRAGMA optimize')
+            self.connection.close()
+            self.closed = True
+        logger.info(f"SQLite database written: {self.db_path} ({len(self.tables)} tables)")
+
+    def abort(self):
+        with self._lock:
+            # A committed database is kept when a later part of the run fails
+            if self.closed:
+                return
+            self.connection.execute('ROLLBACK')
+            self.connection.close()
+            self.closed = True
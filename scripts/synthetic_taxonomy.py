@@ -0,0 +1,251 @@
+import argparse
+import json
+import logging
+import os
+import random
+from string import ascii_lowercase
+
+CATEGORY_URI = 'gid://shopify/TaxonomyCategory/'
+ATTRIBUTE_URI = 'gid://shopify/TaxonomyAttribute/'
+VALUE_URI = 'gid://shopify/TaxonomyValue/'
+
+# Translated languages are taken from the start of this list
+LANGUAGE_CODES = [
+    'fi', 'sv', 'de', 'fr', 'es', 'it', 'nl', 'da', 'nb', 'pl',
+    'pt-BR', 'pt-PT', 'cs', 'ja', 'ko', 'th', 'tr', 'vi', 'zh-CN', 'zh-TW',
+]
+
+# Size of the 1x taxonomy, roughly a tenth of the 2025 Shopify dist
+VERTICALS = 26
+CATEGORIES_PER_VERTICAL = 40
+ATTRIBUTES = 200
+VALUES_PER_ATTRIBUTE = (4, 20)
+ATTRIBUTES_PER_CATEGORY = (2, 10)
+MAX_CHILDREN = 8
+MAX_LEVEL = 6
+
+WORDS = [
+    'Apparel', 'Bags', 'Books', 'Cameras', 'Candles', 'Chairs', 'Cleaning', 'Clocks', 'Cycling',
+    'Decor', 'Drinks', 'Fabric', 'Fishing', 'Garden', 'Gloves', 'Hardware', 'Jewelry', 'Kitchen',
+    'Lamps', 'Luggage', 'Music', 'Office', 'Outdoor', 'Paint', 'Pets', 'Phones', 'Plants',
+    'Pottery', 'Shoes', 'Snacks', 'Sports', 'Storage', 'Tools', 'Toys', 'Travel', 'Watches',
+]
+
+def prefix(index):
+    """Vertical prefix in the style of the dist: aa, ab, ..., zz, baa, ..."""
+    letters = ''
+    while True:
+        index, remainder = divmod(index, len(ascii_lowercase))
+        letters = ascii_lowercase[remainder] + letters
+        if not index and len(letters) >= 2:
+            return letters
+
+def translate(text, lang_code):
+    return text if lang_code == 'en' else f'{text} ({lang_code})'
+
+def build_attributes(rng, scale):
+    """Attributes with their values and extended attributes, plus the flat value list."""
+    attributes = []
+    values = []
+    for attribute_id in range(1, ATTRIBUTES * scale + 1):
+        name = f'{rng.choice(WORDS)} {attribute_id}'
+        handle = name.lower().replace(' ', '-')
+        attribute_values = []
+        for _ in range(rng.randint(*VALUES_PER_ATTRIBUTE)):
+            value_id = len(values) + 1
+            value = {
+                'id': f'{VALUE_URI}{value_id}',
+                'name': f'Value {value_id}',
+                'handle': f'{handle}__value-{value_id}',
+            }
+            values.append({**value, 'attribute': name})
+            attribute_values.append(value)
+        # About a quarter of the attributes have extended attributes, e.g. "Fabric" for "Material"
+        extended_attributes = [
+            {'name': f'{name} {rng.choice(WORDS)}', 'handle': f'{handle}-extended-{index}'}
+            for index in range(rng.choice((0, 0, 0, 1, 2, 3)))
+        ]
+        attributes.append({
+            'id': f'{ATTRIBUTE_URI}{attribute_id}',
+            'name': name,
+            'handle': handle,
+            'description': f'Description of {name.lower()}',
+            'extended_attributes': extended_attributes,
+            'values': attribute_values,
+        })
+    return attributes, values
+
+def category_attributes(rng, attributes):
+    result = []
+    for attribute in rng.sample(attributes, rng.randint(*ATTRIBUTES_PER_CATEGORY)):
+        result.append({
+            'id': attribute['id'],
+            'name': attribute['name'],
+            'handle': attribute['handle'],
+            'description': attribute['description'],
+            'extended': False,
+        })
+        for extended_attribute in attribute['extended_attributes'][:rng.randint(0, 1)]:
+            result.append({
+                'id': attribute['id'],
+                'name': extended_attribute['name'],
+                'handle': extended_attribute['handle'],
+                'description': attribute['description'],
+                'extended': True,
+            })
+    return result
+
+def build_vertical(rng, index, scale, attributes):
+    """One vertical with its categories listed flat, parents before children."""
+    vertical_prefix = prefix(index)
+    vertical_name = f'{WORDS[index % len(WORDS)]} {index + 1}'
+    root = {
+        'id': f'{CATEGORY_URI}{vertical_prefix}',
+        'level': 0,
+        'name': vertical_name,
+        'full_name': vertical_name,
+        'parent_id': None,
+        'attributes': category_attributes(rng, attributes),
+        'children': [],
+        'ancestors': [],
+    }
+    categories = [root]
+    # Breadth first, so every category is listed after its parent
+    queue = [root]
+    while queue and len(categories) < CATEGORIES_PER_VERTICAL * scale:
+        parent = queue.pop(0)
+        for child_index in range(1, rng.randint(2, MAX_CHILDREN) + 1):
+            if len(categories) >= CATEGORIES_PER_VERTICAL * scale:
+                break
+            name = f'{rng.choice(WORDS)} {len(categories)}'
+            category = {
+                'id': f"{parent['id']}-{child_index}",
+                'level': parent['level'] + 1,
+                'name': name,
+                'full_name': f"{parent['full_name']} > {name}",
+                'parent_id': parent['id'],
+                'attributes': category_attributes(rng, attributes),
+                'children': [],
+                'ancestors': [{'id': parent['id'], 'name': parent['name']}] + parent['ancestors'],
+            }
+            parent['children'].append({'id': category['id'], 'name': name})
+            categories.append(category)
+            if category['level'] < MAX_LEVEL:
+                queue.append(category)
+    return {'name': vertical_name, 'prefix': vertical_prefix, 'categories': categories}
+
+def translate_verticals(verticals, lang_code):
+    return [
+        {
+            **vertical,
+            'name': translate(vertical['name'], lang_code),
+            'categories': [
+                {
+                    **category,
+                    'name': translate(category['name'], lang_code),
+                    'full_name': translate(category['full_name'], lang_code),
+                }
+                for category in vertical['categories']
+            ],
+        }
+        for vertical in verticals
+    ]
+
+def translate_attributes(attributes, lang_code):
+    return [
+        {
+            **attribute,
+            'name': translate(attribute['name'], lang_code),
+            'extended_attributes': [
+                {**extended_attribute, 'name': translate(extended_attribute['name'], lang_code)}
+                for extended_attribute in attribute['extended_attributes']
+            ],
+            'values': [{**value, 'name': translate(value['name'], lang_code)} for value in attribute['values']],
+        }
+        for attribute in attributes
+    ]
+
+def write_json(path, data):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+
+def write_txt(path, lines):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('# Shopify Product Taxonomy (synthetic)\n')
+        f.write('# Format: {GID} : {Name}\n\n')
+        for uri, text in lines:
+            f.write(f'{uri:<45} : {text}\n')
+
+def generate_dist(dist_dir, version, scale=1, languages=2, seed=0):
+    """
+    Write a Shopify-shaped dist tree to `{dist_dir}/{lang}/` for English and the
+    first `languages` entries of LANGUAGE_CODES. Sizes grow linearly with scale
+    and the output only depends on the arguments.
+    """
+    if scale < 1:
+        raise ValueError(f"Scale must be at least 1, got {scale}")
+    if languages > len(LANGUAGE_CODES):
+        raise ValueError(f"At most {len(LANGUAGE_CODES)} translated languages are supported")
+
+    rng = random.Random(seed)
+    attributes, values = build_attributes(rng, scale)
+    verticals = [build_vertical(rng, index, scale, attributes) for index in range(VERTICALS)]
+    language_codes = ['en'] + LANGUAGE_CODES[:languages]
+
+    for lang_code in language_codes:
+        lang_dir = f'{dist_dir}/{lang_code}'
+        os.makedirs(lang_dir, exist_ok=True)
+        translated_verticals = translate_verticals(verticals, lang_code)
+        translated_attributes = translate_attributes(attributes, lang_code)
+
+        write_json(f'{lang_dir}/categories.json', {'version': version, 'verticals': translated_verticals})
+        write_json(f'{lang_dir}/attributes.json', {'version': version, 'attributes': translated_attributes})
+        write_json(f'{lang_dir}/attribute_values.json', {
+            'version': version,
+            'values': [
+                {'id': value['id'], 'name': translate(value['name'], lang_code), 'handle': value['handle']}
+                for value in values
+            ],
+        })
+        write_json(f'{lang_dir}/taxonomy.json', {
+            'version': version,
+            'verticals': translated_verticals,
+            'attributes': translated_attributes,
+        })
+
+        write_txt(f'{lang_dir}/categories.txt', [
+            (category['id'], category['full_name'])
+            for vertical in translated_verticals
+            for category in vertical['categories']
+        ])
+        write_txt(f'{lang_dir}/attributes.txt', [
+            (attribute['id'], attribute['name']) for attribute in translated_attributes
+        ])
+        write_txt(f'{lang_dir}/attribute_values.txt', [
+            (value['id'], f"{translate(value['name'], lang_code)} [{translate(value['attribute'], lang_code)}]")
+            for value in values
+        ])
+
+    counts = {
+        'verticals': len(verticals),
+        'categories': sum(len(vertical['categories']) for vertical in verticals),
+        'attributes': len(attributes),
+        'attribute_values': len(values),
+        'languages': language_codes,
+    }
+    logging.getLogger(__name__).info(f"Synthetic dist written: {dist_dir} ({counts})")
+    return counts
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Write a synthetic Shopify taxonomy dist for benchmarks')
+    parser.add_argument('version', help='Version name, the dist is written to data/input/{version}/dist')
+    parser.add_argument('--scale', type=int, default=1, help='Size factor, 10 is about the size of the real dist (default: 1)')
+    parser.add_argument('--languages', type=int, default=2, help='Number of translated languages besides English (default: 2)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    generate_dist(f'data/input/{args.version}/dist', args.version, args.scale, args.languages, args.seed)
+
+if __name__ == "__main__":
+    main()
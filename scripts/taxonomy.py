@@ -0,0 +1,85 @@
+import json
+import threading
+from scripts import instrumentation
+from scripts.json_stream import stream_json
+
+class Taxonomy:
+    """
+    Parsed dist files for one taxonomy version.
+
+    Every `.json` file of the source language is decoded at most once per run
+    and the parsed data is shared by all pipeline steps that read it. Files of
+    the other languages are read by one step each, so they are decoded on every
+    call and dropped by the caller, and peak memory does not grow with the
+    number of languages.
+
+    In streaming mode nothing is kept: every call reads the file incrementally
+    and returns the top-level object with its entity arrays as iterators, which
+    keeps peak memory independent of the dist size.
+    """
+
+    # Arrays that are iterated lazily in streaming mode, per file
+    STREAMED_ARRAYS = {
+        'categories.json': ('verticals', 'categories'),
+        'attributes.json': ('attributes',),
+        'attribute_values.json': ('values',),
+        'taxonomy.json': ('verticals', 'categories'),
+    }
+
+    def __init__(self, version, source_language_code, dist_dir=None, streaming=False):
+        self.version = version
+        self.source_language_code = source_language_code
+        self.dist_dir = dist_dir or f'data/input/{version}/dist'
+        self.streaming = streaming
+        self._cache = {}
+        # One lock per file so concurrent steps wait for a file being decoded
+        # instead of decoding it a second time
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def __getstate__(self):
+        # Worker processes get an empty cache and decode only the files they need
+        state = self.__dict__.copy()
+        state['_cache'] = {}
+        del state['_locks'], state['_locks_guard']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def load(self, lang_code, file_name):
+        """Return the parsed content of `{dist_dir}/{lang_code}/{file_name}`."""
+        path = f'{self.dist_dir}/{lang_code}/{file_name}'
+        if self.streaming:
+            data = stream_json(path, self.STREAMED_ARRAYS[file_name])
+            instrumentation.record_input(path)
+            return data
+        if lang_code != self.source_language_code:
+            with open(path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+            instrumentation.record_input(path)
+            return data
+
+        key = (lang_code, file_name)
+        with self._locks_guard:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            if key not in self._cache:
+                with open(path, 'r', encoding='utf-8') as file:
+                    self._cache[key] = json.load(file)
+                instrumentation.record_input(path)
+            return self._cache[key]
+
+    def categories(self, lang_code):
+        return self.load(lang_code, 'categories.json')
+
+    def attributes(self, lang_code):
+        return self.load(lang_code, 'attributes.json')
+
+    def attribute_values(self, lang_code):
+        return self.load(lang_code, 'attribute_values.json')
+
+    def taxonomy(self, lang_code):
+        return self.load(lang_code, 'taxonomy.json')
@@ -1,24 +1,68 @@
 import csv
 import os
 import logging
+from contextlib import nullcontext
+from itertools import islice
+from scripts import instrumentation
 
-def write_csv(data, fieldnames, output_file):
-    """Write data to a CSV file with the given fieldnames."""
-    # Extract version from output_file path (data/output/version/filename.csv)
-    version = output_file.split('/')[2]
-    output_dir = f'data/output/{version}'
-    os.makedirs(output_dir, exist_ok=True)
+def batched(rows, batch_size):
+    """Yield lists of up to batch_size rows from any iterable."""
+    iterator = iter(rows)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+def table_name(output_file):
+    """Name of the table written to output_file, e.g. 'localizations_category'."""
+    return os.path.splitext(os.path.basename(output_file))[0]
+
+def write_csv(data, fieldnames, output_file, sinks=(), batch_size=10000):
+    """
+    Write data to a CSV file with the given fieldnames.
+
+    Rows are also passed in batches to every sink (e.g. a database loader)
+    under the table name taken from the file name, so each row is produced once.
+    """
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    tables = [sink.table(table_name(output_file), fieldnames) for sink in sinks]
+    row_count = 0
     
     with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
         writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
         writer.writeheader()
-        writer.writerows(data)
+        for batch in batched(data, batch_size):
+            writer.writerows(batch)
+            for table in tables:
+                table.write(batch)
+            row_count += len(batch)
+    
+    for table in tables:
+        table.close()
+    instrumentation.record_output(table_name(output_file), row_count)
+
+def process_step(step_name, extract_func, write_func, *args, cache=None, inputs=(), config=None, report=None):
+    """
+    Process a single step in the pipeline.
 
-def process_step(step_name, extract_func, write_func, *args):
-    """Process a single step in the pipeline."""
+    With a cache, the step is fingerprinted from its input files and config and
+    a stored result for the same fingerprint is written instead of extracting again.
+    With a report, the step's time, memory, input bytes and output rows are recorded.
+    """
     try:
-        data = extract_func(*args)
-        write_func(data)
+        with report.measure(step_name) if report else nullcontext():
+            if cache is None:
+                data = extract_func(*args)
+            else:
+                key = cache.fingerprint(step_name, inputs, config)
+                hit, data = cache.get(key)
+                if hit:
+                    logging.getLogger(__name__).info(f"Reusing cached result for {step_name}")
+                else:
+                    data = extract_func(*args)
+                    cache.put(key, data)
+            write_func(data)
         return data
     except Exception as e:
         logger = logging.getLogger(__name__)
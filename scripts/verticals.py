@@ -1,15 +1,11 @@
-import json
-
-def extract_verticals(json_file_path):
-    with open(json_file_path, 'r', encoding='utf-8') as file:
-        data = json.load(file)
-
+def extract_verticals(data, ids=None):
+    # ids maps a prefix to its serial id (e.g. an IdLedger entry), by default ids follow the dist order
     verticals = data.get('verticals', [])
 
     extracted_info = []
     for i, vertical in enumerate(verticals, 1):
         name = vertical.get('name')
         prefix = vertical.get('prefix')
-        extracted_info.append({'id': i, 'name': name, 'prefix': prefix})
+        extracted_info.append({'id': ids(prefix) if ids else i, 'name': name, 'prefix': prefix})
 
     return extracted_info
\ No newline at end of file